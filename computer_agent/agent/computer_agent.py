@@ -2,19 +2,60 @@
 Computer Agent - Main agent class for computer UI automation
 """
 import logging
+from functools import lru_cache
 from pathlib import Path
-import yaml
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
 import os
 
-from .core.loop import ComputerAgentLoop
-from .mcp.simple_mcp import SimpleMCP
-from .models.mode_manager import ModelManager
 from config.log_config import setup_logging
 
+# The loop, MCP client and model manager pull in heavy dependency trees
+# (LLM SDK, aiohttp, pipeline); they are imported when an agent is built.
+if TYPE_CHECKING:
+    from .core.loop import ComputerAgentLoop
+    from .mcp.simple_mcp import SimpleMCP
+    from .models.mode_manager import ModelManager
+
 # Set up logging
 logger = setup_logging(__name__)
 
+_LAZY_IMPORTS = {
+    "ComputerAgentLoop": ".core.loop",
+    "SimpleMCP": ".mcp.simple_mcp",
+    "ModelManager": ".models.mode_manager",
+}
+
+
+def __getattr__(name: str):
+    """Resolve the names this module used to import eagerly (PEP 562)"""
+    if name in _LAZY_IMPORTS:
+        import importlib
+
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __package__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@lru_cache(maxsize=8)
+def _load_mcp_config(path_str: str, mtime: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Parse the MCP server config and index the servers by id
+
+    Args:
+        path_str: Resolved path of the YAML config file
+        mtime: Modification time of the file (part of the cache key, so edits are picked up)
+
+    Returns:
+        dict: Mapping of server id to its config
+    """
+    import yaml
+
+    with open(path_str, "r") as f:
+        config = yaml.safe_load(f) or {}
+    return {server["id"]: server for server in config.get("mcp_servers", [])}
+
+
 class ComputerAgent:
     def __init__(self, api_key: Optional[str] = None):
         """
@@ -24,32 +65,32 @@ class ComputerAgent:
             api_key: Google API key (optional, can use environment variable)
         """
         logger.info("Initializing ComputerAgent...")
+        from .core.loop import ComputerAgentLoop
+        from .mcp.simple_mcp import mcp_pool
+        from .models.mode_manager import ModelManager
         
         # Load MCP server config
-        config_path = Path("config/mcp_server_config.yaml")
-        with open(config_path, "r") as f:
-            config = yaml.safe_load(f)
-            mcp_servers = config.get("mcp_servers", [])
-            # Filter for windows server only
-            windows_config = next(
-                (server for server in mcp_servers if server["id"] == "windows"),
-                None
-            )
-            if not windows_config:
-                raise ValueError("Windows MCP server config not found")
+        config_path = Path("config/mcp_server_config.yaml").resolve()
+        mcp_servers = _load_mcp_config(str(config_path), os.stat(config_path).st_mtime_ns)
+        # Filter for windows server only
+        windows_config = mcp_servers.get("windows")
+        if not windows_config:
+            raise ValueError("Windows MCP server config not found")
         
-        # Initialize SimpleMCP with windows config
+        # Use the shared SimpleMCP for the windows config (connected in run)
         logger.info("Initializing SimpleMCP with windows tools...")
-        self.mcp = SimpleMCP(windows_config)
+        self._mcp_config = windows_config
+        self._mcp_pool = mcp_pool
+        self.mcp: "SimpleMCP" = mcp_pool.get(windows_config)
         logger.info("SimpleMCP initialized with windows tools")
         
         # Initialize model manager
         logger.info("Initializing ModelManager...")
-        self.model_manager = ModelManager(api_key=api_key)
+        self.model_manager: "ModelManager" = ModelManager(api_key=api_key)
         logger.info("ModelManager initialized")
         
         # Initialize agent loop
-        self.loop = ComputerAgentLoop(self.mcp, self.model_manager)
+        self.loop: "ComputerAgentLoop" = ComputerAgentLoop(self.mcp, self.model_manager, mcp_pool=mcp_pool)
         
     async def run(self, query: str) -> dict:
         """
@@ -64,8 +105,8 @@ class ComputerAgent:
         try:
             logger.info("Starting computer agent operation...")
             
-            # Initialize MCP
-            await self.mcp.initialize()
+            # Initialize MCP (no-op if another agent already holds the connection)
+            await self._mcp_pool.acquire(self._mcp_config)
             
             # Run the agent loop
             result = await self.loop.run(query)
@@ -80,5 +121,5 @@ class ComputerAgent:
                 "error": str(e)
             }
         finally:
-            # Ensure MCP is shut down
-            await self.mcp.shutdown()
+            # Release MCP; it is shut down once the last agent releases it
+            await self._mcp_pool.release(self._mcp_config)
@@ -1,96 +1,336 @@
 """
 Computer Agent Context - Manages agent state and execution context
 """
-from typing import Dict, Any, Optional, List
-from datetime import datetime
+import asyncio
+from typing import Dict, Any, Optional, List, Deque, Iterator, Tuple
+from collections import deque, defaultdict
+from datetime import datetime, timedelta
+from enum import IntEnum
+from itertools import islice
 import json
+import logging
 import os
+import time
+import uuid
 from pathlib import Path
+from types import MappingProxyType
 from config.log_config import log_step, log_json_block, setup_logging, logger_json_block
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
 logger = setup_logging(__name__)
 
-class StepType:
-    ROOT = "ROOT"
-    PERCEPTION = "PERCEPTION"
-    DECISION = "DECISION"
-    TOOL_EXECUTION = "TOOL_EXECUTION"
+# Default number of cycles/state updates kept in the per-session histories
+DEFAULT_HISTORY_LIMIT = 256
+
+# Pipeline output values at or above this size (bytes/str length) are spilled to disk
+BLOB_SPILL_THRESHOLD = 64 * 1024
+
+# Completed/failed steps sent verbatim to the perception and decision prompts; older ones are summarized
+PROMPT_RECENT_STEPS = 5
+
+# "verbose" logs full perception/decision/execution blocks and prompts; anything else one line per phase
+TRACE_LEVEL = os.environ.get("AGENT_TRACE_LEVEL", "compact").lower()
+
+# Step id prefixes that belong to a numbered perception-decision-execution cycle
+CYCLE_STEP_PREFIXES = ("PERCEPTION", "DECISION", "TOOL")
+
+# Cached "YYYY/MM/DD" output path prefix and the epoch time until which it is valid
+_today_prefix = ""
+_today_prefix_expires = 0.0
+
+def _get_today_prefix() -> str:
+    """Get the date part of the session output path, formatting it once per local day"""
+    global _today_prefix, _today_prefix_expires
+    if time.time() >= _today_prefix_expires:
+        now = datetime.now()
+        _today_prefix = now.strftime('%Y/%m/%d')
+        next_midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        _today_prefix_expires = next_midnight.timestamp()
+    return _today_prefix
+
+def format_timestamp_ns(timestamp_ns: int) -> str:
+    """Format a time.time_ns() value as a local ISO-8601 timestamp"""
+    seconds, nanos = divmod(timestamp_ns, 1_000_000_000)
+    return datetime.fromtimestamp(seconds).replace(microsecond=nanos // 1000).isoformat()
+
+def _step_default(obj: Any) -> Any:
+    """JSON `default` hook so Step objects serialize through their cached dict, and arrays as lists"""
+    if isinstance(obj, Step):
+        return obj._shared_dict()
+    if isinstance(obj, MappingProxyType):
+        return dict(obj)  # Step.to_dict() views
+    if hasattr(obj, "tolist"):
+        return obj.tolist()  # Small numpy arrays kept inline by set_pipeline_output
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _encode_event(event: Dict[str, Any]) -> bytes:
+    """Encode one event-log record as a JSON line"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(
+            event,
+            default=str,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+        )
+    return (json.dumps(event, default=str) + "\n").encode("utf-8")
+
+class StepType(IntEnum):
+    ROOT = 0
+    PERCEPTION = 1
+    DECISION = 2
+    TOOL_EXECUTION = 3
 
 class Step:
-    def __init__(self, step_id: str, description: str, step_type: str, from_step: Optional[str] = None):
+    __slots__ = (
+        "id", "description", "type", "from_step", "status",
+        "result", "timestamp_ns", "screen_analysis", "_dict_cache"
+    )
+
+    def __init__(self, step_id: str, description: str, step_type: StepType, from_step: Optional[str] = None):
         self.id = step_id
         self.description = description
-        self.type = step_type
+        # Accept the legacy string names as well as StepType members
+        self.type = StepType[step_type] if isinstance(step_type, str) else step_type
         self.from_step = from_step
         self.status = "pending"  # pending, completed, failed
         self.result = None
-        self.timestamp = datetime.now().isoformat()
+        self.timestamp_ns = time.time_ns()  # Formatted only when serialized
         self.screen_analysis = ""
+        self._dict_cache = None  # Reset by the context whenever status/result change
 
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "description": self.description,
-            "type": self.type,
-            "from_step": self.from_step,
-            "status": self.status,
-            "result": self.result,
-            "timestamp": self.timestamp
-        }
+    @property
+    def timestamp(self) -> str:
+        return format_timestamp_ns(self.timestamp_ns)
+
+    def to_dict(self) -> "MappingProxyType[str, Any]":
+        """Read-only view of the cached serialized step; copy it (dict(...)) to modify"""
+        return MappingProxyType(self._shared_dict())
+
+    def _shared_dict(self) -> Dict[str, Any]:
+        """Cached serialized step, shared by the context's buckets, snapshot and event log; never modify it
+        
+        Status changes build a new dict rather than updating this one, so a
+        view taken earlier keeps showing the step as it was then.
+        """
+        if self._dict_cache is None:
+            self._dict_cache = {
+                "id": self.id,
+                "description": self.description,
+                "type": self.type.name,
+                "from_step": self.from_step,
+                "status": self.status,
+                "result": self.result,
+                "timestamp": self.timestamp
+            }
+        return self._dict_cache
 
 class ComputerAgentContext:
-    def __init__(self, session_id: str, query: str):
+    def __init__(self, session_id: str, query: str, history_limit: int = DEFAULT_HISTORY_LIMIT):
         self.session_id = session_id
         self.query = query
+        self.history_limit = history_limit
         self.steps: Dict[str, Step] = {}
+        self.steps_by_cycle: Dict[int, List[Step]] = defaultdict(list)
+        self._step_index: Dict[str, int] = {}  # Step id -> dense int, see step_slot()
+        self._step_cycle: Dict[str, int] = {}  # Step id -> cycle number, for cycle-bound steps
+        self._cycle_counts: Dict[int, Dict[str, int]] = {}  # Cycle -> {"completed", "failed", "total"}
+        self._steps_snapshot: List[Dict[str, Any]] = []  # Shared step dict per step, in insertion order
+        self._snapshot_pos: Dict[str, int] = {}  # Step id -> position in _steps_snapshot
         self.current_step = None
         self.pipeline_output = None  # Stores the enhanced pipeline output
         self.screenshot_path = None
+        self.trace_level = TRACE_LEVEL
+        self.last_tool_mutates = True  # False when the last tool left the screen untouched
+        # Error perception/decision from a failed tool, consumed by the next cycle instead of re-analyzing
+        self._pending_perception: Optional[Dict[str, Any]] = None
+        self._pending_decision: Optional[Dict[str, Any]] = None
         self.start_time = datetime.now()
         
         # Add state management (similar to browser agent)
+        # state_history keeps only the per-update deltas; evicted deltas are folded into _state_base
         self.current_state: Dict[str, Any] = {}
-        self.state_history: List[Dict[str, Any]] = []
+        self.state_history: Deque[Dict[str, Any]] = deque(maxlen=history_limit)
+        self._state_base: Dict[str, Any] = {}
         self.failed_steps: List[str] = []
         
+        # Steps bucketed by terminal status, in the order they reached it
+        self.completed_steps: Dict[str, Step] = {}
+        self.failed_steps_refs: Dict[str, Step] = {}
+        # Same buckets as serialized dicts, for prompt inputs
+        self._completed_dicts: Dict[str, Dict[str, Any]] = {}
+        self._failed_dicts: Dict[str, Dict[str, Any]] = {}
+        self.prompt_recent_steps = PROMPT_RECENT_STEPS
+        self._buckets_version = 0  # Bumped whenever a step enters the completed/failed buckets
+        self._history_summary_cache = (-1, -1, "")  # (buckets version, k, summary)
+        
         # Add memory management (similar to browser agent)
         self.memory: List[Dict[str, Any]] = []
         self.globals: Dict[str, Any] = {}
-        self.global_history: Dict[str, List[Any]] = {}
+        self.global_history: Dict[str, Deque[Any]] = {}
         
         # Add cycle tracking directly in context (like browser agent)
-        self.perception_history: List[Dict[str, Any]] = []
-        self.decision_history: List[Dict[str, Any]] = []
-        self.execution_history: List[Dict[str, Any]] = []
+        self.perception_history: Deque[Dict[str, Any]] = deque(maxlen=history_limit)
+        self.decision_history: Deque[Dict[str, Any]] = deque(maxlen=history_limit)
+        self.execution_history: Deque[Dict[str, Any]] = deque(maxlen=history_limit)
+        self.cycle_count = 0
         
         # Add new fields as strings
         self.screen_analysis = ""  # Will store JSON string of screen analysis
         
-        # Create output directory for this session
-        self.output_dir = Path(f"outputs/{datetime.now().strftime('%Y/%m/%d')}/{session_id}")
-        self.output_dir.mkdir(parents=True, exist_ok=True)
+        # Output directory for this session (created on first write)
+        self.output_dir = Path("outputs") / _get_today_prefix() / session_id
+        self.output_dir_str = str(self.output_dir)  # For APIs that take str paths
+        self._output_dir_ready = False
+        
+        # Append-only event log (events.jsonl), buffered in memory until the next flush;
+        # records are encoded by the flush, off the hot path
+        self._pending_events: List[Dict[str, Any]] = []
         
         # Initialize with root step
         self.add_step("ROOT", "Initial query", StepType.ROOT)
 
-    def add_step(self, step_id: str, description: str, step_type: str, from_step: Optional[str] = None) -> Step:
+    def step_slot(self, step_id: str) -> int:
+        """Dense int for a step id, assigned on first use and stable for the session"""
+        return self._step_index.setdefault(step_id, len(self._step_index))
+
+    def add_step(self, step_id: str, description: str, step_type: StepType, from_step: Optional[str] = None) -> Step:
         """Add a new step to the context"""
         step = Step(step_id, description, step_type, from_step)
         self.steps[step_id] = step
+        self.step_slot(step_id)
+        prefix, _, cycle = step_id.rpartition("_")
+        if prefix in CYCLE_STEP_PREFIXES and cycle.isdigit():
+            cycle_number = int(cycle)
+            self.steps_by_cycle[cycle_number].append(step)
+            self._step_cycle[step_id] = cycle_number
+            counts = self._cycle_counts.setdefault(cycle_number, {"completed": 0, "failed": 0, "total": 0})
+            counts["total"] += 1
         self.current_step = step
+        self._set_snapshot(step)
+        self._log_event({"event": "add_step", "step": step._shared_dict()})
         return step
 
+    def _set_snapshot(self, step: Step) -> None:
+        """Refresh a step's entry in the serialized step list"""
+        pos = self._snapshot_pos.get(step.id)
+        if pos is None:
+            self._snapshot_pos[step.id] = len(self._steps_snapshot)
+            self._steps_snapshot.append(step._shared_dict())
+        else:
+            self._steps_snapshot[pos] = step._shared_dict()
+
+    def _update_cycle_counts(self, step: Step, new_status: str) -> None:
+        """Move a step between the per-cycle status counters"""
+        cycle_number = self._step_cycle.get(step.id)
+        if cycle_number is None:
+            return
+        counts = self._cycle_counts[cycle_number]
+        if step.status in counts:
+            counts[step.status] -= 1
+        counts[new_status] += 1
+
     def mark_step_completed(self, step_id: str, result: Any = None) -> None:
         """Mark a step as completed with optional result"""
-        if step_id in self.steps:
-            self.steps[step_id].status = "completed"
-            self.steps[step_id].result = result
+        step = self.steps.get(step_id)
+        if step is not None:
+            self._update_cycle_counts(step, "completed")
+            step.status = "completed"
+            step.result = result
+            step._dict_cache = None
+            self.failed_steps_refs.pop(step_id, None)
+            self.completed_steps[step_id] = step
+            self._failed_dicts.pop(step_id, None)
+            self._completed_dicts[step_id] = step._shared_dict()
+            self._buckets_version += 1
+            self._set_snapshot(step)
+            self._log_event({"event": "step_status", "id": step_id, "status": "completed", "result": result})
 
     def mark_step_failed(self, step_id: str, error: str) -> None:
         """Mark a step as failed with error message"""
-        if step_id in self.steps:
-            self.steps[step_id].status = "failed"
-            self.steps[step_id].result = {"error": error}
+        step = self.steps.get(step_id)
+        if step is not None:
+            self._update_cycle_counts(step, "failed")
+            step.status = "failed"
+            step.result = {"error": error}
+            step._dict_cache = None
+            self.completed_steps.pop(step_id, None)
+            self.failed_steps_refs[step_id] = step
+            self._completed_dicts.pop(step_id, None)
+            self._failed_dicts[step_id] = step._shared_dict()
+            self._buckets_version += 1
+            self._set_snapshot(step)
+            self._log_event({"event": "step_status", "id": step_id, "status": "failed", "result": step.result})
+
+    def defer_analysis(self, perception: Dict[str, Any], decision: Dict[str, Any]) -> None:
+        """Hand a failed tool's error perception and new decision to the next cycle"""
+        self._pending_perception = perception
+        self._pending_decision = decision
+
+    @property
+    def has_deferred_analysis(self) -> bool:
+        """True when the next cycle should use the deferred analysis instead of perceiving"""
+        return self._pending_perception is not None
+
+    def take_deferred_analysis(self) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Return and clear the deferred (perception, decision)"""
+        analysis = (self._pending_perception, self._pending_decision)
+        self._pending_perception = self._pending_decision = None
+        return analysis
+
+    def steps_snapshot(self) -> List[Dict[str, Any]]:
+        """Serialized steps in insertion order (copies the caller may modify)"""
+        return [dict(d) for d in self._steps_snapshot]
+
+    @property
+    def completed_step_dicts(self) -> List[Dict[str, Any]]:
+        """Serialized completed steps, in the order they completed (copies the caller may modify)"""
+        return [dict(d) for d in self._completed_dicts.values()]
+
+    @property
+    def failed_step_dicts(self) -> List[Dict[str, Any]]:
+        """Serialized failed steps, in the order they failed (copies the caller may modify)"""
+        return [dict(d) for d in self._failed_dicts.values()]
+
+    def prompt_history(self) -> Dict[str, Any]:
+        """Step history for per-cycle prompts: the last few steps in full, older ones as a short summary"""
+        k = self.prompt_recent_steps
+        version, cached_k, summary = self._history_summary_cache
+        if version != self._buckets_version or cached_k != k:
+            completed = list(self._completed_dicts.values())
+            failed = list(self._failed_dicts.values())
+            # Everything but the last k (all of it when k is 0; [:-0] would be empty)
+            summary = self.history_summary(
+                completed[:max(len(completed) - k, 0)], failed[:max(len(failed) - k, 0)]
+            )
+            self._history_summary_cache = (self._buckets_version, k, summary)
+        return {
+            "completed_steps": self._recent(self._completed_dicts, k),
+            "failed_steps": self._recent(self._failed_dicts, k),
+            "history_summary": summary
+        }
+
+    @staticmethod
+    def _recent(bucket: Dict[str, Dict[str, Any]], k: int) -> List[Dict[str, Any]]:
+        """Copies of the last k entries of a status bucket, oldest first, without copying the whole bucket"""
+        recent = [dict(d) for d in islice(reversed(bucket.values()), k)]
+        recent.reverse()
+        return recent
+
+    @staticmethod
+    def history_summary(older_completed: List[Dict[str, Any]], older_failed: List[Dict[str, Any]]) -> str:
+        """One-line summary of steps dropped from the prompt history"""
+        parts = []
+        if older_completed:
+            actions = [d["description"] for d in older_completed if d["type"] == StepType.TOOL_EXECUTION.name]
+            parts.append(f"{len(older_completed)} earlier completed steps (actions: {'; '.join(actions) or 'none'})")
+        if older_failed:
+            parts.append(f"{len(older_failed)} earlier failed steps ({', '.join(d['id'] for d in older_failed)})")
+        return ". ".join(parts)
 
     def get_step(self, step_id: str) -> Optional[Step]:
         """Get a step by ID"""
@@ -104,23 +344,204 @@ class ComputerAgentContext:
         """Update the screen analysis information as a JSON string"""
         self.screen_analysis = screen_analysis_json
 
-    def save_summary(self) -> str:
-        """Save the session summary to a JSON file"""
-        summary = {
+    def set_pipeline_output(self, raw: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Store the pipeline output, spilling raw binary / very large values to disk
+        
+        Top-level values that are bytes, arrays or strings of BLOB_SPILL_THRESHOLD
+        or more are written to <output_dir>/blobs/<uuid>.bin and replaced with
+        {"__blobref__": path}, so the context (and session summary) only carries
+        the structured fields.
+        
+        Returns:
+            The stored (slimmed) pipeline output
+        """
+        if not isinstance(raw, dict):
+            self.pipeline_output = raw
+            return raw
+        
+        slim, blobs = self._slim_pipeline_output(raw)
+        self._write_blobs(blobs)
+        self.pipeline_output = slim
+        return slim
+
+    async def set_pipeline_output_async(self, raw: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """set_pipeline_output with the blob writes on a worker thread instead of the event loop"""
+        if not isinstance(raw, dict):
+            self.pipeline_output = raw
+            return raw
+        
+        slim, blobs = self._slim_pipeline_output(raw)
+        if blobs:
+            await asyncio.to_thread(self._write_blobs, blobs)
+        self.pipeline_output = slim
+        return slim
+
+    def _slim_pipeline_output(self, raw: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Tuple[str, Any]]]:
+        """Replace blob-like values with references; returns (slim output, [(blob path, value)] to write)"""
+        slim = dict(raw)
+        blobs = []
+        for key, value in raw.items():
+            ref = self._blob_ref(value)
+            if ref is not None:
+                slim[key] = ref
+                blobs.append((ref["__blobref__"], value))
+        return slim, blobs
+
+    def _blob_ref(self, value: Any) -> Optional[Dict[str, Any]]:
+        """Reference for a blob-like value of BLOB_SPILL_THRESHOLD or more, or None to keep it inline"""
+        ref: Dict[str, Any] = {}
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            size = value.nbytes if isinstance(value, memoryview) else len(value)
+        elif isinstance(value, str):
+            size = len(value)
+        elif hasattr(value, "tobytes") and hasattr(value, "nbytes"):
+            # numpy array (e.g. an image); keep what is needed to rebuild it
+            size = value.nbytes
+            ref["shape"] = list(value.shape)
+            ref["dtype"] = str(value.dtype)
+        else:
+            return None
+        if size < BLOB_SPILL_THRESHOLD:
+            return None
+        ref["__blobref__"] = str(self.output_dir / "blobs" / f"{uuid.uuid4().hex}.bin")
+        return ref
+
+    @staticmethod
+    def _write_blobs(blobs: List[Tuple[str, Any]]) -> None:
+        """Write spilled values to their blob files"""
+        for path, value in blobs:
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if isinstance(value, str):
+                data = value.encode("utf-8")
+            elif isinstance(value, (bytes, bytearray, memoryview)):
+                data = value
+            else:
+                data = value.tobytes()
+            path.write_bytes(data)
+
+    def _ensure_output_dir(self) -> Path:
+        """Create the session output directory the first time something is written"""
+        if not self._output_dir_ready:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            self._output_dir_ready = True
+        return self.output_dir
+
+    def _log_event(self, event: Dict[str, Any]) -> None:
+        """Queue an event for the append-only session log"""
+        event["timestamp_ns"] = time.time_ns()
+        self._pending_events.append(event)
+
+    def _take_pending_events(self) -> List[Dict[str, Any]]:
+        events, self._pending_events = self._pending_events, []
+        return events
+
+    @staticmethod
+    def _append_events(events_file: Path, events: List[Dict[str, Any]]) -> None:
+        """Encode events and append them to the session event log"""
+        if events:
+            with open(events_file, "ab") as f:
+                f.write(b"".join(_encode_event(event) for event in events))
+
+    def flush_events(self) -> str:
+        """Append queued events to events.jsonl (O(new events), never rewrites the log)"""
+        events_file = self._ensure_output_dir() / "events.jsonl"
+        self._append_events(events_file, self._take_pending_events())
+        return str(events_file)
+
+    def _checkpoint_header(self) -> Dict[str, Any]:
+        """Small header pointing at the event log, written next to it by checkpoints"""
+        return {
+            "session_id": self.session_id,
+            "query": self.query,
+            "start_time": self.start_time.isoformat(),
+            "events_file": str(self.output_dir / "events.jsonl"),
+            "cycle_count": self.cycle_count,
+            "step_count": len(self.steps)
+        }
+
+    @classmethod
+    def _write_checkpoint(cls, output_dir: Path, events: List[Dict[str, Any]], header: Dict[str, Any]) -> str:
+        """Append events to events.jsonl and rewrite the checkpoint header"""
+        cls._append_events(output_dir / "events.jsonl", events)
+        header_file = output_dir / "summary_header.json"
+        with open(header_file, "wb") as f:
+            f.write(_encode_event(header))
+        return str(header_file)
+
+    def checkpoint(self) -> str:
+        """Persist session progress cheaply for crash recovery
+        
+        Flushes the event log and writes a small header; the full state can be
+        rebuilt from events.jsonl with load_events().
+        """
+        output_dir = self._ensure_output_dir()
+        return self._write_checkpoint(output_dir, self._take_pending_events(), self._checkpoint_header())
+
+    async def checkpoint_async(self) -> str:
+        """checkpoint() with the encoding and file writes on a worker thread"""
+        output_dir = self._ensure_output_dir()
+        events = self._take_pending_events()
+        header = self._checkpoint_header()
+        return await asyncio.to_thread(self._write_checkpoint, output_dir, events, header)
+
+    @staticmethod
+    def load_events(events_file: str) -> Iterator[Dict[str, Any]]:
+        """Stream the records of an events.jsonl session log"""
+        with open(events_file, "rb") as f:
+            for line in f:
+                if line.strip():
+                    yield orjson.loads(line) if ORJSON_AVAILABLE else json.loads(line)
+
+    def _build_summary(self) -> Dict[str, Any]:
+        """Snapshot the session into a summary dict"""
+        return {
             "session_id": self.session_id,
             "query": self.query,
             "start_time": self.start_time.isoformat(),
             "end_time": datetime.now().isoformat(),
-            "steps": [step.to_dict() for step in self.steps.values()],
+            "steps": [step.to_dict() for step in self.steps.values()],  # Taken now; later status changes don't touch them
             "pipeline_output": self.pipeline_output,
             "screenshot_path": str(self.screenshot_path) if self.screenshot_path else None,
             "screen_analysis": self.screen_analysis  # Already a string
         }
+
+    @staticmethod
+    def _write_summary(output_file: Path, summary: Dict[str, Any]) -> None:
+        """Serialize a summary dict to disk"""
+        if ORJSON_AVAILABLE:
+            with open(output_file, "wb") as f:
+                f.write(orjson.dumps(
+                    summary,
+                    default=_step_default,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+                ))
+        else:
+            with open(output_file, "w") as f:
+                json.dump(summary, f, indent=2, default=_step_default)
+
+    def save_summary(self) -> str:
+        """Save the session summary to a JSON file"""
+        output_file = self._ensure_output_dir() / "session_summary.json"
+        self.flush_events()
+        self._write_summary(output_file, self._build_summary())
+        return str(output_file)
+
+    async def save_summary_async(self) -> str:
+        """Save the session summary without blocking the event loop
         
-        output_file = self.output_dir / "session_summary.json"
-        with open(output_file, "w") as f:
-            json.dump(summary, f, indent=2)
-            
+        Step views are taken on the loop thread, and status changes replace
+        rather than update the dicts behind them, so steps updated while the
+        write is in flight cannot race the encoder; only encoding and the
+        file write run in a worker thread.
+        """
+        output_dir = self._ensure_output_dir()
+        output_file = output_dir / "session_summary.json"
+        events = self._take_pending_events()
+        summary = self._build_summary()
+        await asyncio.to_thread(self._append_events, output_dir / "events.jsonl", events)
+        await asyncio.to_thread(self._write_summary, output_file, summary)
         return str(output_file)
 
     def print_cycle_steps(self, cycle_number: int) -> None:
@@ -131,7 +552,8 @@ class ComputerAgentContext:
             cycle_number: The current cycle number
         """
         
-        if cycle_number <= 0:
+        # Nothing below is worth formatting if INFO output is filtered out
+        if cycle_number <= 0 or not logger.isEnabledFor(logging.INFO):
             return
         
         # Log session header
@@ -139,16 +561,8 @@ class ComputerAgentContext:
         
         # Iterate through all cycles up to current
         for current_cycle in range(1, cycle_number + 1):
-            # Get steps for this cycle
-            cycle_steps = []
-            for step_id, step in self.steps.items():
-                if step_id.startswith(f"PERCEPTION_{current_cycle}") or \
-                   step_id.startswith(f"DECISION_{current_cycle}") or \
-                   step_id.startswith(f"TOOL_{current_cycle}"):
-                    cycle_steps.append(step)
-            
-            # Sort steps by their sequence
-            cycle_steps.sort(key=lambda x: x.id)
+            # Steps for this cycle, already in sequence order
+            cycle_steps = self.steps_by_cycle.get(current_cycle, [])
             
             # Log cycle header
             log_step(f"🔄 Cycle {current_cycle}")
@@ -157,7 +571,7 @@ class ComputerAgentContext:
             for step in cycle_steps:
                 # Create step header with status indicator
                 status_emoji = "✅" if step.status == "completed" else "❌" if step.status == "failed" else "⏳"
-                log_step(f"{status_emoji} {step.id} - {step.type}")
+                log_step(f"{status_emoji} {step.id} - {step.type.name}")
                 
                 # Log step details in a compact format
                 step_info = {
@@ -170,7 +584,7 @@ class ComputerAgentContext:
                 
                 # Log step result if exists
                 if step.result:
-                    if step.type == "TOOL_EXECUTION":
+                    if step.type == StepType.TOOL_EXECUTION:
                         # For tool execution, show success and message
                         result_info = {
                             "Success": step.result.get("success", False),
@@ -188,9 +602,12 @@ class ComputerAgentContext:
             
             # Log cycle summary
             log_step(f"📊 Cycle {current_cycle} Summary")
-            logger.info(f"• Steps: {', '.join(step.id for step in cycle_steps)}")
-            logger.info(f"• Status: {'✅ Completed' if all(step.status == 'completed' for step in cycle_steps) else '❌ Failed'}")
-            logger.info(f"• Goal Achieved: {'✅ Yes' if self.perception_history[current_cycle-1].get('local_goal_achieved', False) else '❌ No'}")
+            perception = self.get_cycle_perception(current_cycle)
+            logger.info("• Steps: %s", ", ".join(step.id for step in cycle_steps))
+            counts = self._cycle_counts.get(current_cycle)
+            all_completed = counts is None or counts["completed"] == counts["total"]
+            logger.info("• Status: %s", "✅ Completed" if all_completed else "❌ Failed")
+            logger.info("• Goal Achieved: %s", "✅ Yes" if perception and perception.get("local_goal_achieved", False) else "❌ No")
             
             # Add separator between cycles
             if current_cycle < cycle_number:
@@ -202,16 +619,26 @@ class ComputerAgentContext:
         self.perception_history.append(perception)
         self.decision_history.append(decision)
         self.execution_history.append(execution)
+        self.cycle_count += 1
+        self._log_event({
+            "event": "cycle",
+            "cycle": self.cycle_count,
+            "perception": perception,
+            "decision": decision,
+            "execution": execution
+        })
         
         # Update state with cycle information
+        now_ns = time.time_ns()
         self.update_state({
             "last_cycle": {
                 "perception": perception,
                 "decision": decision,
                 "execution": execution,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": format_timestamp_ns(now_ns),
+                "timestamp_ns": now_ns
             }
-        })
+        }, timestamp_ns=now_ns)
         
         # Log cycle summary with proper formatting
         #cycle_number = len(self.perception_history)
@@ -235,23 +662,41 @@ class ComputerAgentContext:
         #logger.info(f"• Route: {perception.get('route', 'N/A')}")
         #logger.info(f"• Computer State: {perception.get('computer_state', 'N/A')}")
 
-    def update_state(self, new_state: Dict[str, Any]) -> None:
+    def get_cycle_perception(self, cycle_number: int) -> Optional[Dict[str, Any]]:
+        """Get the recorded perception for a 1-based cycle number, if still retained"""
+        index = cycle_number - 1 - (self.cycle_count - len(self.perception_history))
+        if 0 <= index < len(self.perception_history):
+            return self.perception_history[index]
+        return None
+
+    def update_state(self, new_state: Dict[str, Any], timestamp_ns: Optional[int] = None) -> None:
         """Update the current state with new values"""
         self.current_state.update(new_state)
+        if len(self.state_history) == self.state_history.maxlen:
+            self._state_base.update(self.state_history.popleft()["delta"])
         self.state_history.append({
-            "timestamp": datetime.now().isoformat(),
-            "state": self.current_state.copy()
+            "timestamp_ns": timestamp_ns if timestamp_ns is not None else time.time_ns(),
+            "delta": new_state
         })
 
+    def get_state_at(self, index: int) -> Dict[str, Any]:
+        """Reconstruct the full state as it was after the given entry of state_history"""
+        state = dict(self._state_base)
+        for position, entry in enumerate(self.state_history):
+            if position > index:
+                break
+            state.update(entry["delta"])
+        return state
+
     def update_globals(self, new_vars: Dict[str, Any]) -> None:
-        """Update global variables with versioning"""
+        """Update global variables; globals holds the current value, global_history every version"""
         for k, v in new_vars.items():
-            if k in self.globals:
-                versioned_key = f"{k}__{len(self.global_history.get(k, []))}"
-                self.globals[versioned_key] = v
-                if k not in self.global_history:
-                    self.global_history[k] = []
-                self.global_history[k].append(v)
-            else:
-                self.globals[k] = v
-                self.global_history[k] = [v]
+            self.globals[k] = v
+            history = self.global_history.get(k)
+            if history is None:
+                history = self.global_history[k] = deque(maxlen=self.history_limit)
+            history.append(v)
+
+    def get_version(self, key: str, index: int) -> Any:
+        """Get a retained version of a global variable (0 = oldest retained, -1 = latest)"""
+        return self.global_history[key][index]
@@ -1,20 +1,78 @@
 """
 Decision Module - Decides next action based on perception
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from datetime import datetime
-import json
+from functools import partial
 from pathlib import Path
-from config.log_config import setup_logging, logger_json_block, logger_prompt
-from agent.utils.json_parser import parse_llm_json
+from config.log_config import setup_logging, logger_json_block, logger_prompt, JSON_BLOCK
+from agent.utils.json_parser import parse_llm_json, dumps_compact
+from agent.utils.prompt_loader import load_prompt, PROMPT_RELOAD
 
 logger = setup_logging(__name__)
 
+# Keys every decision response must contain
+DECISION_KEYS = [
+    "selected_tool",
+    "tool_parameters",
+    "reasoning",
+    "confidence"
+]
+
 class Decision:
     def __init__(self, model_manager, multi_mcp):
         self.model = model_manager
         self.multi_mcp = multi_mcp
         self.prompt_path = Path("agent/prompts/decision_prompt.txt")
+        self._prompt_template = load_prompt(self.prompt_path)
+        
+        # Tool catalog from list_tools(), valid while multi_mcp.version is unchanged
+        self._tools_cache: Optional[Dict[str, Any]] = None
+        self._tools_version: Optional[int] = None
+        
+        # Prompt prefix rendered for the last seen template and tool catalog
+        self._cached_template = None
+        self._cached_tools = None
+        self._cached_prompt_prefix = None
+
+    @property
+    def prompt_template(self) -> str:
+        """Decision prompt, re-read after edits when AGENT_PROMPT_RELOAD=1"""
+        if PROMPT_RELOAD:
+            self._prompt_template = load_prompt(self.prompt_path)
+        return self._prompt_template
+
+    def _get_prompt_prefix(self, available_tools: Dict[str, Any]) -> str:
+        """Render the prompt template with the tool list, reusing it while template and catalog are unchanged"""
+        template = self.prompt_template
+        if (self._cached_prompt_prefix is None or template is not self._cached_template
+                or available_tools != self._cached_tools):
+            tool_list = "\n".join(
+                f"- {tool_name}: {tool_info['description']}\n  Params: {tool_info.get('params', {})}"
+                for category in available_tools.values()
+                for tool_name, tool_info in category.items()
+            )
+            self._cached_template = template
+            self._cached_tools = available_tools
+            self._cached_prompt_prefix = template.replace("{TOOL_LIST}", tool_list).strip()
+        return self._cached_prompt_prefix
+
+    async def _get_available_tools(self) -> Dict[str, Any]:
+        """Get the tool catalog, only asking the MCP server again after it reinitializes"""
+        version = self.multi_mcp.version
+        if self._tools_cache is None or self._tools_version != version:
+            tools = await self.multi_mcp.list_tools()
+            if not tools:
+                # list_tools() returns {} on failure; don't cache that
+                return tools
+            self._tools_cache = tools
+            self._tools_version = version
+        return self._tools_cache
+
+    async def get_prompt_prefix(self) -> Tuple[str, Dict[str, Any]]:
+        """Get the decision prompt prefix together with the tool catalog it was rendered from"""
+        available_tools = await self._get_available_tools()
+        return self._get_prompt_prefix(available_tools), available_tools
 
     async def decide(self, ctx, perception: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -29,47 +87,33 @@ class Decision:
         """
         try:
             # Get available tools
-            available_tools = await self.multi_mcp.list_tools()
+            available_tools = await self._get_available_tools()
             
             # Build decision input
             decision_input = {
                 "original_query": ctx.query,
                 "perception": perception,
                 "available_tools": available_tools,
-                "completed_steps": [step.to_dict() for step in ctx.steps.values() if step.status == "completed"],
-                "failed_steps": [step.to_dict() for step in ctx.steps.values() if step.status == "failed"]
+                **ctx.prompt_history()
             }
             
-            # Get prompt template
-            prompt_template = self.prompt_path.read_text(encoding="utf-8")
-            
-            # Format tool list
-            tool_list = "\n".join(
-                f"- {tool_name}: {tool_info['description']}\n  Params: {tool_info.get('params', {})}"
-                for category in available_tools.values()
-                for tool_name, tool_info in category.items()
-            )
+            # Prompt with tool list (cached per tool catalog)
+            prompt_prefix = self._get_prompt_prefix(available_tools)
             
-            # Replace tool list in prompt
-            full_prompt = prompt_template.replace("{TOOL_LIST}", tool_list)
-            full_prompt = f"{full_prompt.strip()}\n\n```json\n{json.dumps(decision_input, indent=2)}\n```"
+            # The LLM does not need pretty-printed input
+            prompt_input = f"```json\n{dumps_compact(decision_input)}\n```"
             
             # Log the prompt
-            #logger_prompt(logger, "📝 Decision prompt:", full_prompt)
+            #logger_prompt(logger, "📝 Decision prompt:", f"{prompt_prefix}\n\n{prompt_input}")
             
-            # Get LLM response
-            response = await self.model.generate_text(prompt=full_prompt)
-            
-            # Parse response using robust parser
-            decision = parse_llm_json(response, required_keys=[
-                "selected_tool",
-                "tool_parameters",
-                "reasoning",
-                "confidence"
-            ])
+            # Get LLM response, parsed with the robust parser; the tool-list prefix is identical across turns and cached
+            decision = await self.model.generate_parsed(
+                prompt_input, partial(parse_llm_json, required_keys=DECISION_KEYS), prefix=prompt_prefix
+            )
             
             # Log decision results
-            logger_json_block(logger, "Decision Results", decision)
+            if logger.isEnabledFor(JSON_BLOCK):
+                logger_json_block(logger, "Decision Results", decision)
             
             return decision
             
@@ -1,18 +1,50 @@
 """
 Execution Tracker - Manages execution attempts and retries
 """
-from collections import defaultdict
+from array import array
 from typing import Dict
 
+# Largest value an unsigned short ('H') counter can hold
+_MAX_ATTEMPTS = 0xFFFF
+
 class ExecutionTracker:
-    def __init__(self, max_retries: int = 3):
+    def __init__(self, max_retries: int = 3, ctx=None):
+        """
+        Args:
+            max_retries: Maximum attempts per step
+            ctx: Optional ComputerAgentContext whose step_slot() interns ids,
+                 so step ids are interned once per session
+        """
         self.max_retries = max_retries
-        self.attempts: Dict[str, int] = defaultdict(int)
+        self._step_index: Dict[str, int] = {}
+        self._intern = ctx.step_slot if ctx is not None else self._local_slot
+        self.attempts = array('H')
+
+    def _local_slot(self, step_id: str) -> int:
+        """Intern a step id when no context is shared"""
+        return self._step_index.setdefault(step_id, len(self._step_index))
+
+    def _slot(self, step_id: str) -> int:
+        """Get the counter slot for a step id, interning it if new"""
+        slot = self._intern(step_id)
+        if slot >= len(self.attempts):
+            self.attempts.extend([0] * (slot + 1 - len(self.attempts)))
+        return slot
         
     def should_retry(self, step_id: str) -> bool:
         """Check if step should be retried"""
-        return self.attempts[step_id] < self.max_retries
+        slot = self._intern(step_id)
+        if slot >= len(self.attempts):
+            return self.max_retries > 0
+        return self.attempts[slot] < self.max_retries
         
+    def attempts_for(self, step_id: str) -> int:
+        """Number of attempts recorded for a step"""
+        slot = self._intern(step_id)
+        return self.attempts[slot] if slot < len(self.attempts) else 0
+
     def record_attempt(self, step_id: str) -> None:
         """Record an execution attempt"""
-        self.attempts[step_id] += 1
+        slot = self._slot(step_id)
+        if self.attempts[slot] < _MAX_ATTEMPTS:
+            self.attempts[slot] += 1
@@ -2,24 +2,56 @@
 Computer Agent Loop - Main execution loop for the computer agent
 """
 import asyncio
-from typing import Dict, Any, Optional
-from datetime import datetime
+import copy
+import json
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Set, Tuple
 import logging
+import mmap
+import os
 from pathlib import Path
 import pprint
+import random
+import re
+import tempfile
+import time
 
 from .context import ComputerAgentContext, StepType, Step
-from pipeline.screenshot import take_screenshot
-from pipeline.pipeline import run_pipeline
+from .execution import ExecutionTracker
 from utils.output_manager import get_output_folder
 from config.log_config import setup_logging, log_step, logger_json_block, log_json_block
-from agent.core.perception import Perception
+from agent.core.perception import Perception, PerceptionCache
 from agent.core.decision import Decision
 from agent.core.summary import Summary
+from agent.utils.json_parser import dumps_compact, JsonParsingError
 
 # Set up logging
 logger = setup_logging(__name__)
 
+# Reuse perception results for near-identical screens; set AGENT_PERCEPTION_CACHE=1 to enable
+PERCEPTION_CACHE_ENABLED = os.getenv("AGENT_PERCEPTION_CACHE", "0") == "1"
+
+# Tool errors whose handling is known without asking perception: (pattern, verdict)
+# "retry_same_action" repeats the failed call as is; otherwise a new decision is made
+_ERROR_RULES = [
+    (re.compile(r"timed? ?out", re.I),
+     {"should_retry": True, "retry_same_action": True, "error_kind": "timeout"}),
+    (re.compile(r"connection (reset|refused|aborted)|server disconnected", re.I),
+     {"should_retry": True, "retry_same_action": True, "error_kind": "connection"}),
+    (re.compile(r"(permission|access( is)?) denied", re.I),
+     {"should_retry": False, "error_kind": "permission"}),
+    (re.compile(r"(element|window|control) not found|no such (element|window)", re.I),
+     {"should_retry": True, "error_kind": "not_found"}),
+]
+
+
+def _classify_error(error_msg: str) -> Optional[Dict[str, Any]]:
+    """Verdict for a known tool error, or None when perception has to look at it"""
+    for pattern, verdict in _ERROR_RULES:
+        if pattern.search(error_msg):
+            return dict(verdict)
+    return None
+
 
 
 def print_structure(d, prefix=''):
@@ -41,22 +73,75 @@ def print_structure(d, prefix=''):
 #Open notepad, type "Hello World", open a new tab and type "I am Computer use agent! and then exit. Use screenid 1, always.
 
 class ComputerAgentLoop:
-    def __init__(self, multi_mcp, model_manager):
+    def __init__(self, multi_mcp, model_manager, mcp_pool=None):
         """
         Initialize the computer agent loop
         
         Args:
             multi_mcp: MultiMCP instance for tool execution
             model_manager: ModelManager instance for LLM integration
+            mcp_pool: SimpleMCPPool that shares multi_mcp with other agents, if any;
+                      reconnects then go through the pool
         """
         self.multi_mcp = multi_mcp
+        self.mcp_pool = mcp_pool
         self.model_manager = model_manager
         self.perception = Perception(model_manager)
         self.decision = Decision(model_manager, multi_mcp)
         self.summary = Summary(model_manager)
         self.max_steps = 10  # Maximum number of steps per session
         self.max_retries = 3  # Maximum retries per step
+        self.retry_base = 0.05  # Seconds before the first retry, doubled per attempt
+        self.retry_cap = 1.0  # Upper bound on the backoff before jitter
         self.max_re_analysis = 1  # Maximum number of cycles per session
+        self.settle_delay = 1  # Seconds to let the UI settle after a tool runs
+        self.prefetch_capture = True  # Capture the next screen while the current cycle is recorded
+        self.speculative_perception = True  # Start the next perception as soon as the prefetched capture lands
+        self._frame_buffer = None  # Reused screen-capture buffer, allocated on first capture
+        self.perception_cache: Optional[PerceptionCache] = PerceptionCache() if PERCEPTION_CACHE_ENABLED else None
+        self.fuse_perception_decision = False  # Opt-in: one LLM call for perception + decision per cycle
+        self._log_slots = asyncio.Semaphore(2)  # Bounds in-flight background log_json_block calls
+        self._log_tasks: Set[asyncio.Task] = set()
+        self.tool_cache_size = 128
+        self._tool_result_cache: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()  # Idempotent tool results
+        self.health_check_interval = 5  # Ping the MCP server every N steps instead of reconnecting per call
+        self._hb, self._hb_view = None, None  # Cycle-start heartbeat for external profilers, mapped per run
+        
+    @staticmethod
+    def _heartbeat_path() -> Path:
+        return Path(tempfile.gettempdir()) / f"agent_hb_{os.getpid()}"
+        
+    @classmethod
+    def _open_heartbeat(cls):
+        """
+        Map an 8-byte heartbeat file (<tmp>/agent_hb_<pid>) holding the monotonic
+        ns timestamp of the latest cycle start, so an out-of-process profiler can
+        spot cycles running past their budget.
+        
+        Returns:
+            Tuple of (mmap, uint64 view), or (None, None) if the file can't be mapped
+        """
+        try:
+            with open(cls._heartbeat_path(), "wb+") as f:
+                f.write(b"\0" * 8)
+                f.flush()
+                hb = mmap.mmap(f.fileno(), 8)
+            return hb, memoryview(hb).cast("Q")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Heartbeat file unavailable: {str(e)}")
+            return None, None
+        
+    def _close_heartbeat(self) -> None:
+        """Unmap the heartbeat and remove its file"""
+        if self._hb is None:
+            return
+        self._hb_view.release()
+        self._hb.close()
+        self._hb, self._hb_view = None, None
+        try:
+            self._heartbeat_path().unlink()
+        except OSError:
+            pass
         
     async def run(self, query: str) -> Dict[str, Any]:
         """
@@ -69,39 +154,61 @@ class ComputerAgentLoop:
             Dict containing the result of the operation
         """
         # Create session ID and context
-        session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        # Second-resolution timestamp plus the ns remainder, so concurrent sessions don't collide
+        now_ns = time.time_ns()
+        session_id = f"session_{time.strftime('%Y%m%d_%H%M%S', time.localtime(now_ns // 1_000_000_000))}_{now_ns % 1_000_000_000:09d}"
         base_output_dir = get_output_folder(session_id)  # Store base output directory
         logger.info(f"Output directory: {base_output_dir}")
         ctx = ComputerAgentContext(session_id, query)
+        if self.perception_cache is not None:
+            self.perception_cache.clear()  # Entries describe another run's screens
+        next_capture: Optional[asyncio.Task] = None
+        next_perception: Optional[asyncio.Task] = None
+        self._hb, self._hb_view = self._open_heartbeat()
         
         try:
             logger.info(f"Starting computer agent session {session_id}")
             step_count = 0
             re_analysis_count = 0
             
+            # One long-lived MCP session serves every tool call in the run
+            await self.multi_mcp.ensure_connected()
+            
             while step_count < self.max_steps:
-                log_step(f"🔄 Starting new cycle with step count {step_count + 1}")
-                logger.info(f"🔄 Starting new cycle with step count {step_count + 1}")
-
-                # Create step directory at the same level
-                step_output_dir = base_output_dir.joinpath(f"step_{step_count + 1}")
-                step_output_dir.mkdir(parents=True, exist_ok=True)
-
-                # Step 1: Take screenshot and run pipeline for current state
-                log_step("📸 Taking screenshot")
-                screenshot_path = take_screenshot(
-                    output_dir=str(step_output_dir),
-                    suffix=f"step_{step_count + 1}"
-                )
-                ctx.screenshot_path = screenshot_path
-                logger.info(f"Screenshot taken and saved to {screenshot_path}")
+                if self._hb_view is not None:
+                    self._hb_view[0] = time.monotonic_ns()
+                
+                if step_count and step_count % self.health_check_interval == 0 and not await self.multi_mcp.ping():
+                    logger.warning("MCP server not responding, reconnecting")
+                    if self.mcp_pool is not None:
+                        await self.mcp_pool.reconnect(self.multi_mcp.server_config)
+                    else:
+                        await self.multi_mcp.reconnect()
+                
+                # Step ids and edges for this cycle, built once
+                step_number = step_count + 1
+                perception_id = f"PERCEPTION_{step_number}"
+                decision_id = f"DECISION_{step_number}"
+                tool_id = f"TOOL_{step_number}"
+                prev_tool_id = "ROOT" if step_count == 0 else f"TOOL_{step_count}"
                 
-                # Run pipeline on screenshot
-                log_step("🔍 Running image processing pipeline")
-                pipeline_result = await run_pipeline(screenshot_path, mode="mcp_deploy", output_dir=str(step_output_dir))
-                ctx.pipeline_output = pipeline_result
+                log_step(f"🔄 Starting new cycle with step count {step_number}")
+                logger.info(f"🔄 Starting new cycle with step count {step_number}")
+
+                # Step 1: Screenshot + pipeline for current state (prefetched at the end of the previous cycle,
+                # reused as-is when the last tool could not have changed the screen or its error analysis is pending)
+                reuse_analysis = ctx.has_deferred_analysis
+                if next_capture is None and (reuse_analysis or not ctx.last_tool_mutates) and ctx.pipeline_output is not None:
+                    logger.info("Reusing the last capture")
+                    pipeline_result = ctx.pipeline_output
+                else:
+                    if next_capture is None:
+                        next_capture = asyncio.create_task(self._capture_and_process(base_output_dir, step_number))
+                    screenshot_path, pipeline_result = await next_capture
+                    next_capture = None
+                    ctx.screenshot_path = screenshot_path
+                    await ctx.set_pipeline_output_async(pipeline_result)
                 #log_json_block("Pipeline Result", pipeline_result)
-                log_step("🔍 Image processing pipeline completed")
 
                 # Call this function on pipeline_result
                 logger.info("Printing pipeline result structure")
@@ -132,10 +239,10 @@ class ComputerAgentLoop:
                 
                 # Step 2: Perception
                 perception_step = ctx.add_step(
-                    f"PERCEPTION_{step_count + 1}",
+                    perception_id,
                     "Analyzing current screen state",
                     StepType.PERCEPTION,
-                    from_step="ROOT" if step_count == 0 else f"TOOL_{step_count}"
+                    from_step=prev_tool_id
                 )
                 
                 if step_count == 0:
@@ -143,72 +250,103 @@ class ComputerAgentLoop:
                 else:
                     snapshot_type = "step_result"
 
-                log_step(f"🧠 Running perception analysis for step {step_count + 1}")
-                logger.info(f"🧠 Running perception analysis for step {step_count + 1}")
-                perception = await self.perception.analyze(
-                    ctx, 
-                    seraphine_gemini_groups,
-                    snapshot_type=snapshot_type
-                )
-                logger.info(f"🧠 Perception analysis completed for step {step_count + 1}")
+                log_step(f"🧠 Running perception analysis for step {step_number}")
+                logger.info(f"🧠 Running perception analysis for step {step_number}")
+                if reuse_analysis:
+                    # The failed tool's error perception/decision already describe this screen
+                    perception, fused_decision = ctx.take_deferred_analysis()
+                elif next_perception is not None:
+                    # Started speculatively as soon as the prefetched capture finished
+                    perception, fused_decision = await next_perception
+                    next_perception = None
+                else:
+                    perception, fused_decision = await self._perceive(ctx, seraphine_gemini_groups, snapshot_type)
+                logger.info(f"🧠 Perception analysis completed for step {step_number}")
                 ctx.update_screen_analysis(perception.get("screen_analysis"))
                 ctx.mark_step_completed(perception_step.id, perception)
-                log_json_block(f"📌 Perception output for step {step_count + 1}", perception, char_limit=2000)
+                await self._trace(ctx, "perception.done", f"📌 Perception output for step {step_number}", perception,
+                                  char_limit=2000, step=step_number, route=perception.get("route"))
                 
                 # When perception suggests summarization
                 if perception.get("route") == "summarize":
                     logger.info("Perception suggests summarization - task complete")
-                    log_step(f"🔄 Summarization task complete for step {step_count + 1}")
+                    log_step(f"🔄 Summarization task complete for step {step_number}")
                     #ctx.print_cycle_steps(step_count + 1)
                     return await self.summary.summarize(query, ctx, perception)
                     
                 
                 # Step 3: Decision
                 decision_step = ctx.add_step(
-                    f"DECISION_{step_count + 1}",
+                    decision_id,
                     "Deciding next action",
                     StepType.DECISION,
-                    from_step=f"PERCEPTION_{step_count + 1}"
+                    from_step=perception_id
                 )
                 
-                log_step(f"🤔 Making decision for step {step_count + 1}")
-                logger.info(f"🤔 Making decision for step {step_count + 1}")
-                decision = await self.decision.decide(ctx, perception)
-                logger.info(f"🤔 Decision completed for step {step_count + 1}")
+                log_step(f"🤔 Making decision for step {step_number}")
+                logger.info(f"🤔 Making decision for step {step_number}")
+                if fused_decision is not None:
+                    decision = fused_decision  # Already produced alongside the perception
+                else:
+                    decision = await self.decision.decide(ctx, perception)
+                logger.info(f"🤔 Decision completed for step {step_number}")
                 ctx.mark_step_completed(decision_step.id, decision)
-                log_json_block(f"📌 Decision output for step {step_count + 1}", decision)
+                await self._trace(ctx, "decision.done", f"📌 Decision output for step {step_number}", decision,
+                                  step=step_number, tool=decision.get("selected_tool"))
                 
                 # Step 4: Tool Execution
                 if not decision.get("selected_tool"):
-                    logger.warning(f"🔄 No tool selected by decision module for step {step_count + 1}")
-                    log_step(f"🔄 No tool selected by decision module for step {step_count + 1}")
+                    logger.warning(f"🔄 No tool selected by decision module for step {step_number}")
+                    log_step(f"🔄 No tool selected by decision module for step {step_number}")
                     break
                     
                 tool_step = ctx.add_step(
-                    f"TOOL_{step_count + 1}",
+                    tool_id,
                     f"Executing {decision['selected_tool']}",
                     StepType.TOOL_EXECUTION,
-                    from_step=f"DECISION_{step_count + 1}"
+                    from_step=decision_id
                 )
                 
                 # Log tool execution details
-                log_step(f"🛠️ Executing tool for step {step_count + 1}: {decision['selected_tool']}", decision["tool_parameters"])
-                logger.info(f"🛠️ Executing tool for step {step_count + 1}: {decision['selected_tool']}")
-                logger.info(f"🛠️ Tool Parameters for step {step_count + 1}: {decision['tool_parameters']}")
-                #log_json_block(f"📌 Tool Parameters for step {step_count + 1}", decision["tool_parameters"])
+                if logger.isEnabledFor(logging.INFO):
+                    log_step(f"🛠️ Executing tool for step {step_number}: {decision['selected_tool']}", decision["tool_parameters"])
+                logger.info(f"🛠️ Executing tool for step {step_number}: {decision['selected_tool']}")
+                logger.info(f"🛠️ Tool Parameters for step {step_number}: {decision['tool_parameters']}")
+                #log_json_block(f"📌 Tool Parameters for step {step_number}", decision["tool_parameters"])
                 
-                # Execute tool with retries
-                #execution_result = await self._execute_with_retry(ctx, decision, tool_step)
-                execution_result = await self._execute_tool(ctx, decision, tool_step)
-                logger.info(f"🛠️ Tool execution completed for step {step_count + 1}")
-                logger.info(f"🛠️ Execution result for step {step_count + 1}: {execution_result}")
-                log_json_block(f"📌 Execution result for step {step_count + 1}", execution_result)
-
-                #sleep for 10 seconds
-                await asyncio.sleep(1)
+                # Execute tool; only idempotent calls are retried, a repeated click or keystroke would act twice
+                if self._is_idempotent(decision):
+                    execution_result = await self._execute_with_retry(ctx, decision, tool_step)
+                else:
+                    execution_result = await self._execute_tool(ctx, decision, tool_step)
+                logger.info(f"🛠️ Tool execution completed for step {step_number}")
+                await self._trace(ctx, "tool.done", f"📌 Execution result for step {step_number}", execution_result,
+                                  step=step_number, success=not (isinstance(execution_result, dict)
+                                                                 and execution_result.get("success") is False))
+
+                # Let the UI settle, then capture the next screen while this cycle is recorded
+                # (read-only tools leave the current capture valid, so nothing is captured)
+                ctx.last_tool_mutates = any(
+                    self.multi_mcp.get_tool_meta(name).mutates_screen for name, _ in self._tool_calls(decision)
+                )
+                if ctx.last_tool_mutates and not ctx.has_deferred_analysis:
+                    if self.prefetch_capture and step_count + 1 < self.max_steps:
+                        next_capture = asyncio.create_task(
+                            self._capture_and_process(base_output_dir, step_number + 1, settle_delay=self.settle_delay)
+                        )
+                    else:
+                        await asyncio.sleep(self.settle_delay)
                 
-                # Record complete cycle
+                # Record complete cycle, then persist it so a crashed session can be rebuilt
                 ctx.record_cycle(perception, decision, execution_result)
+                try:
+                    await ctx.checkpoint_async()
+                except OSError as e:
+                    logger.warning(f"Session checkpoint failed: {str(e)}")
+                
+                # With the cycle recorded, the history the next perception reads is final
+                if next_capture is not None and self.speculative_perception:
+                    next_perception = asyncio.create_task(self._speculate_perception(ctx, next_capture))
 
                 # Print all cycles up to current
                 #ctx.print_cycle_steps(step_count + 1)
@@ -242,6 +380,143 @@ class ComputerAgentLoop:
                 ctx,
                 {"route": "summarize", "solution_summary": f"Task failed: {str(e)}"}
             )
+        finally:
+            # Drop a prefetched capture the session no longer needs
+            self._discard_prefetch(next_capture, next_perception)
+            # Let queued log blocks finish printing before the session returns
+            if self._log_tasks:
+                await asyncio.gather(*self._log_tasks, return_exceptions=True)
+            self._close_heartbeat()
+
+    @staticmethod
+    def _discard_prefetch(*tasks: Optional[asyncio.Task]) -> None:
+        """Cancel unfinished prefetch tasks and retrieve the errors of finished ones"""
+        for task in tasks:
+            if task is None:
+                continue
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled() and task.exception() is not None:
+                # Retrieved here so it is logged rather than reported as never retrieved
+                logger.warning(f"Discarded prefetch failed: {str(task.exception())}")
+
+    async def _trace(self, ctx: ComputerAgentContext, event: str, message: str, data: Any,
+                     char_limit: int = 500, **fields: Any) -> None:
+        """Log a phase result: the full block when tracing verbosely, otherwise a one-line event"""
+        if ctx.trace_level == "verbose":
+            logger.info(f"{message}: {data}")
+            await self._log_json_block_bg(message, data, char_limit)
+        elif logger.isEnabledFor(logging.INFO):
+            logger.info(f"{event} {dumps_compact(fields)}")
+
+    async def _log_json_block_bg(self, message: str, data: Any, char_limit: int = 500) -> None:
+        """Format and print a JSON log block on a worker thread without waiting for it"""
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        await self._log_slots.acquire()
+        task = asyncio.create_task(asyncio.to_thread(log_json_block, message, data, char_limit))
+        self._log_tasks.add(task)
+        task.add_done_callback(self._log_task_done)
+
+    def _log_task_done(self, task: asyncio.Task) -> None:
+        self._log_tasks.discard(task)
+        self._log_slots.release()
+
+    async def _capture_and_process(self, base_output_dir: Path, step_number: int, settle_delay: float = 0) -> Tuple[Optional[str], Dict[str, Any]]:
+        """
+        Take a screenshot and run the image processing pipeline on it
+        
+        Args:
+            base_output_dir: Session output directory
+            step_number: 1-based step the capture belongs to
+            settle_delay: Seconds to wait before capturing (lets the UI settle after a tool)
+            
+        Returns:
+            Tuple of (screenshot path, pipeline result)
+        """
+        # Imported on first capture: the pipeline pulls in OpenCV, the detectors and Gemini
+        from pipeline.screenshot import take_screenshot_buffer, save_screenshot
+        from pipeline.pipeline import run_pipeline
+        
+        if settle_delay:
+            await asyncio.sleep(settle_delay)
+        
+        # Create step directory at the same level
+        step_output_dir = base_output_dir.joinpath(f"step_{step_number}")
+        step_output_dir.mkdir(parents=True, exist_ok=True)
+        step_output_dir_str = str(step_output_dir)
+
+        log_step("📸 Taking screenshot")
+        frame = await asyncio.to_thread(take_screenshot_buffer, self._frame_buffer)
+        if frame is not None:
+            self._frame_buffer = frame
+            # Grouped-image and Gemini stages reopen the file, so it is still written
+            screenshot_path = await asyncio.to_thread(
+                save_screenshot, frame, step_output_dir_str, f"step_{step_number}"
+            )
+        else:
+            screenshot_path = None
+        logger.info(f"Screenshot taken and saved to {screenshot_path}")
+        
+        # Run pipeline on the in-memory frame (no re-read of the file for detection)
+        log_step("🔍 Running image processing pipeline")
+        pipeline_result = await run_pipeline(
+            screenshot_path, mode="mcp_deploy", output_dir=step_output_dir_str, image=frame
+        )
+        log_step("🔍 Image processing pipeline completed")
+        return screenshot_path, pipeline_result
+
+    async def _call_tool(self, tool_name: str, params: Dict[str, Any]) -> Any:
+        """Execute a tool, answering idempotent tools from the result cache when possible"""
+        if not self.multi_mcp.get_tool_meta(tool_name).idempotent:
+            return await self.multi_mcp.execute_tool(tool_name, params)
+        
+        key = (tool_name, json.dumps(params, sort_keys=True, default=str))
+        if key in self._tool_result_cache:
+            self._tool_result_cache.move_to_end(key)
+            logger.info(f"♻️ Using cached result for {tool_name}")
+            return copy.deepcopy(self._tool_result_cache[key])
+        
+        result = await self.multi_mcp.execute_tool(tool_name, params)
+        if not (isinstance(result, dict) and result.get("success") is False):
+            self._tool_result_cache[key] = copy.deepcopy(result)
+            if len(self._tool_result_cache) > self.tool_cache_size:
+                self._tool_result_cache.popitem(last=False)
+        return result
+
+    @staticmethod
+    def _tool_calls(decision: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        """(tool, parameters) pairs of a decision; "selected_tools" lists several independent calls"""
+        tools = decision.get("selected_tools")
+        if isinstance(tools, list):
+            calls = [
+                (call["selected_tool"], call.get("tool_parameters") or {})
+                for call in tools
+                if isinstance(call, dict) and call.get("selected_tool")
+            ]
+            if calls:
+                return calls
+        return [(decision["selected_tool"], decision["tool_parameters"])]
+
+    async def _call_decision_tools(self, decision: Dict[str, Any]) -> Any:
+        """Execute the decision's tool, or all of its tools when it selected several"""
+        calls = self._tool_calls(decision)
+        if len(calls) == 1:
+            return await self._call_tool(*calls[0])
+        
+        # Read-only tools cannot interfere, so they run together; UI actions keep their order
+        if not any(self.multi_mcp.get_tool_meta(name).mutates_screen for name, _ in calls):
+            results = await self.multi_mcp.execute_tools_batch(calls)
+        else:
+            results = []
+            for name, params in calls:
+                results.append(await self._call_tool(name, params))
+                if isinstance(results[-1], dict) and results[-1].get("success") is False:
+                    break  # Later actions assumed this one worked
+        return {
+            "success": not any(isinstance(result, dict) and result.get("success") is False for result in results),
+            "results": [{"tool": name, "result": result} for (name, _), result in zip(calls, results)],
+        }
 
     async def _execute_tool(self, ctx: ComputerAgentContext, decision: Dict[str, Any], tool_step: Step) -> Dict[str, Any]:
         """
@@ -257,10 +532,7 @@ class ComputerAgentLoop:
         """
         try:
             # Execute the tool
-            result = await self.multi_mcp.execute_tool(
-                decision["selected_tool"],
-                decision["tool_parameters"]
-            )
+            result = await self._call_decision_tools(decision)
             
             # Mark step as completed with result
             ctx.mark_step_completed(tool_step.id, result)
@@ -272,23 +544,36 @@ class ComputerAgentLoop:
             raise
 
     async def _execute_with_retry(self, ctx: ComputerAgentContext, decision: Dict[str, Any], tool_step: Step) -> Dict[str, Any]:
-        """Execute tool with retry logic"""
-        retry_count = 0
-        while retry_count < self.max_retries:
+        """Execute an idempotent decision with retry logic"""
+        tracker = ExecutionTracker(self.max_retries, ctx)
+        result = None
+        while tracker.should_retry(tool_step.id):
             try:
-                result = await self.multi_mcp.execute_tool(
-                    decision["selected_tool"],
-                    decision["tool_parameters"]
-                )
+                result = await self._call_decision_tools(decision)
                 
                 if isinstance(result, dict) and result.get('success') is False:
                     # Handle failure
                     error_msg = result.get('message', 'Unknown error')
-                    error_perception = await self._handle_error(ctx, error_msg, decision)
+                    retry_result, error_perception = await self._retry_while_analyzing(
+                        ctx, decision, error_msg, tool_step.id
+                    )
+                    if retry_result is not None:
+                        ctx.mark_step_completed(tool_step.id, retry_result)
+                        return retry_result
                     
                     if error_perception.get("should_retry"):
-                        retry_count += 1
-                        decision = await self._adjust_decision(ctx, error_perception)
+                        tracker.record_attempt(tool_step.id)
+                        if error_perception.get("retry_same_action"):
+                            await asyncio.sleep(self._retry_delay(tracker.attempts_for(tool_step.id)))
+                            continue
+                        failed_tool = decision["selected_tool"]
+                        decision = await self._adjust_decision(ctx, error_perception, tool_step.id)
+                        if decision.get("selected_tool") != failed_tool or not self._is_idempotent(decision):
+                            # Switching tools is a new step (and may not be safe to repeat): hand this
+                            # analysis to the next cycle rather than capturing and analyzing the same screen again
+                            ctx.defer_analysis(error_perception, decision)
+                            ctx.mark_step_failed(tool_step.id, error_msg)
+                            return result
                         continue
                     
                 # Success or non-retryable error
@@ -296,40 +581,163 @@ class ComputerAgentLoop:
                 return result
                 
             except Exception as e:
-                retry_count += 1
-                if retry_count == self.max_retries:
+                tracker.record_attempt(tool_step.id)
+                # Raised errors go through the same rules, so e.g. a permission error is not retried
+                verdict = _classify_error(str(e))
+                if not tracker.should_retry(tool_step.id) or (verdict is not None and not verdict["should_retry"]):
                     ctx.mark_step_failed(tool_step.id, str(e))
                     raise
-                await asyncio.sleep(1)
+                await asyncio.sleep(self._retry_delay(tracker.attempts_for(tool_step.id)))
+        
+        # Retries exhausted on a failed result
+        error_msg = result.get('message', 'Unknown error') if isinstance(result, dict) else 'Retries exhausted'
+        ctx.mark_step_failed(tool_step.id, error_msg)
+        return result
+
+    def _is_idempotent(self, decision: Dict[str, Any]) -> bool:
+        """True when every call of the decision may safely be repeated"""
+        return all(self.multi_mcp.get_tool_meta(name).idempotent for name, _ in self._tool_calls(decision))
+
+    async def _retry_while_analyzing(self, ctx: ComputerAgentContext, decision: Dict[str, Any],
+                                     error_msg: str, tool_step_id: str) -> Tuple[Optional[Any], Optional[Dict[str, Any]]]:
+        """
+        Retry an idempotent decision while the error is being analyzed
+        
+        Returns:
+            (retry result, None) when the retry succeeded, otherwise (None, error perception)
+        """
+        retry_task = asyncio.create_task(self._call_decision_tools(decision))
+        analysis_task = asyncio.create_task(self._handle_error(ctx, error_msg, decision, tool_step_id))
+        try:
+            try:
+                retry_result = await retry_task
+            except Exception as e:
+                logger.warning(f"Speculative retry failed: {str(e)}")
+                retry_result = None
+            if retry_result is not None and not (isinstance(retry_result, dict) and retry_result.get("success") is False):
+                logger.info("♻️ Speculative retry succeeded; dropping error analysis")
+                return retry_result, None
+            return None, await analysis_task
+        finally:
+            if not analysis_task.done():
+                analysis_task.cancel()
 
-    async def _handle_error(self, ctx: ComputerAgentContext, error_msg: str, decision: Dict[str, Any]) -> Dict[str, Any]:
+    def _retry_delay(self, retry_count: int) -> float:
+        """Jittered exponential backoff for the given retry attempt"""
+        return min(self.retry_cap, self.retry_base * 2 ** retry_count) * random.uniform(0.5, 1.5)
+
+    async def _speculate_perception(self, ctx: ComputerAgentContext,
+                                    capture: asyncio.Task) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """
+        Run the next cycle's perception on a prefetched capture without waiting for the loop
+        
+        The task is started once the cycle has been recorded and checkpointed,
+        so the history it reads is the one the next cycle would use itself.
+        """
+        _, pipeline_result = await capture
+        seraphine_gemini_groups = self.extract_seraphine_data(pipeline_result, 'seraphine_gemini_groups')
+        return await self._perceive(ctx, seraphine_gemini_groups, "step_result")
+
+    async def _perceive(self, ctx: ComputerAgentContext, pipeline_result: Any,
+                        snapshot_type: str) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """
+        Run perception for a cycle, fusing it with the decision call when enabled
+        
+        A fused response that fails validation falls back to the separate
+        perception prompt; the decision is then made by the decision prompt.
+        
+        Returns:
+            Tuple of (perception, decision); decision is None when it still has to be made
+        """
+        if not self.fuse_perception_decision:
+            return await self._analyze_cached(ctx, pipeline_result, snapshot_type), None
+        
+        cache = self.perception_cache
+        embedding = partition = None
+        if cache is not None:
+            partition = cache.partition_for(ctx, snapshot_type)
+            embedding = cache.embed(pipeline_result)
+            perception = cache.lookup(partition, embedding)
+            if perception is not None:
+                return perception, None
+        
+        try:
+            perception, decision = await self.perception.analyze_and_decide(
+                ctx, pipeline_result, self.decision, snapshot_type=snapshot_type
+            )
+        except JsonParsingError as e:
+            logger.warning(f"Fused perception/decision output invalid ({str(e)}), running perception alone")
+            perception = await self.perception.analyze(ctx, pipeline_result, snapshot_type=snapshot_type)
+            decision = None
+        if cache is not None:
+            cache.add(partition, embedding, perception)
+        return perception, decision
+
+    async def _analyze_cached(self, ctx: ComputerAgentContext, pipeline_result: Any, snapshot_type: str) -> Dict[str, Any]:
+        """Run perception, reusing a cached result when the screen is near-identical"""
+        cache = self.perception_cache
+        if cache is None:
+            return await self.perception.analyze(ctx, pipeline_result, snapshot_type=snapshot_type)
+
+        partition = cache.partition_for(ctx, snapshot_type)
+        embedding = cache.embed(pipeline_result)
+        perception = cache.lookup(partition, embedding)
+        if perception is None:
+            perception = await self.perception.analyze(ctx, pipeline_result, snapshot_type=snapshot_type)
+            cache.add(partition, embedding, perception)
+        return perception
+
+    async def _handle_error(self, ctx: ComputerAgentContext, error_msg: str, decision: Dict[str, Any],
+                            tool_step_id: str) -> Dict[str, Any]:
         """Handle error state and determine if retry is needed"""
         # Create error perception step
         error_perception_step = ctx.add_step(
-            f"ERROR_PERCEPTION_{ctx.current_step.id}",
+            f"ERROR_PERCEPTION_{tool_step_id}",
             "Analyzing error state",
             StepType.PERCEPTION,
-            from_step=ctx.current_step.id
+            from_step=tool_step_id
         )
         
-        # Run perception on error
-        error_perception = await self.perception.analyze(
-            ctx,
-            ctx.pipeline_output,
-            snapshot_type="error_state"
-        )
+        # Known errors reuse this cycle's perception; only unknown ones are analyzed again
+        verdict = _classify_error(error_msg)
+        if verdict is not None:
+            error_perception = {
+                **self._cycle_perception(ctx, error_perception_step),
+                **verdict,
+                "route": "decision",
+                "local_goal_achieved": False,
+                "last_tooluse_summary": f"{decision.get('selected_tool')} failed: {error_msg}"
+            }
+        else:
+            try:
+                error_perception = await self._analyze_cached(ctx, ctx.pipeline_output, "error_state")
+            except asyncio.CancelledError:
+                # Dropped by _retry_while_analyzing after its retry succeeded; don't leave the step pending
+                ctx.mark_step_completed(error_perception_step.id, {"superseded": "retry succeeded"})
+                raise
         ctx.mark_step_completed(error_perception_step.id, error_perception)
         
         return error_perception
 
-    async def _adjust_decision(self, ctx: ComputerAgentContext, error_perception: Dict[str, Any]) -> Dict[str, Any]:
+    @staticmethod
+    def _cycle_perception(ctx: ComputerAgentContext, step: Step) -> Dict[str, Any]:
+        """Perception result the given step descends from, following from_step links"""
+        step = ctx.get_step(step.from_step)
+        while step is not None and step.type != StepType.PERCEPTION:
+            step = ctx.get_step(step.from_step) if step.from_step else None
+        if step is not None and isinstance(step.result, dict):
+            return step.result
+        return {}
+
+    async def _adjust_decision(self, ctx: ComputerAgentContext, error_perception: Dict[str, Any],
+                               tool_step_id: str) -> Dict[str, Any]:
         """Adjust decision based on error perception"""
         # Create error decision step
         error_decision_step = ctx.add_step(
-            f"ERROR_DECISION_{ctx.current_step.id}",
+            f"ERROR_DECISION_{tool_step_id}",
             "Deciding next action after error",
             StepType.DECISION,
-            from_step=f"ERROR_PERCEPTION_{ctx.current_step.id}"
+            from_step=f"ERROR_PERCEPTION_{tool_step_id}"
         )
         
         # Run decision on error perception
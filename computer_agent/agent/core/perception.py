@@ -1,19 +1,160 @@
 """
 Perception Module - Analyzes current state and decides next action
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+from collections import Counter, OrderedDict
+from functools import partial
 from datetime import datetime
-import json
+import copy
+import math
+import re
+import zlib
 from pathlib import Path
-from config.log_config import setup_logging, logger_json_block, logger_prompt, log_step, log_json_block
-from agent.utils.json_parser import parse_llm_json
+from config.log_config import setup_logging, logger_json_block, logger_prompt, log_step, log_json_block, JSON_BLOCK, PROMPT_BLOCK
+from agent.utils.json_parser import parse_llm_json, validate_required_keys, dumps_compact, JsonParsingError
+from agent.utils.prompt_loader import load_prompt, PROMPT_RELOAD
+from agent.core.decision import DECISION_KEYS
 
 logger = setup_logging(__name__)
 
+_TOKEN_RE = re.compile(r"\w+")
+
+# Keys every perception response must contain
+PERCEPTION_KEYS = [
+    'entities',
+    'result_requirement',
+    'original_goal_achieved',
+    'reasoning',
+    'local_goal_achieved',
+    'local_reasoning',
+    'last_tooluse_summary',
+    'solution_summary',
+    'confidence',
+    'route',
+    'open_windows',
+    'screen_analysis'
+]
+
+# Joins the perception and decision instructions for analyze_and_decide
+_COMBINED_PROMPT_HEADER = """
+=======
+You play BOTH roles below in a single response: first the perception role above, then the
+decision role that follows, acting on your own perception output.
+=======
+""".strip()
+
+_COMBINED_PROMPT_FOOTER = """
+=======
+## ✅ COMBINED OUTPUT FORMAT
+
+Return ONE strict JSON object with exactly two keys:
+
+{"perception": { ...perception output... }, "decision": { ...decision output... }}
+
+If perception routes to `summarize`, still return a decision object; it will be ignored.
+=======
+""".strip()
+
+
+class PerceptionCache:
+    """
+    Similarity cache for perception results.
+
+    Screen snapshots are embedded as L2-normalised hashed bag-of-token vectors
+    (sparse bucket -> weight dicts), so near-identical screens (nothing changed,
+    or a small delta) land close together. Entries only match within the same
+    partition (see partition_for): the task query and snapshot type. A hit needs
+    cosine similarity >= threshold. Oldest entries are evicted past max_entries.
+    """
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 64, dim: int = 1024):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.dim = dim
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()  # row id -> (partition, embedding, perception)
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def partition_for(ctx, snapshot_type: str) -> Tuple:
+        """Cache partition for the context's task; the screen itself is matched by similarity"""
+        return (ctx.query, snapshot_type)
+
+    def clear(self) -> None:
+        """Drop every cached perception"""
+        self._entries.clear()
+
+    @classmethod
+    def _screen_text(cls, value: Any):
+        """Yield the string values of a pipeline result (the screen's text), skipping keys and numbers"""
+        if isinstance(value, str):
+            yield value
+        elif isinstance(value, dict):
+            for item in value.values():
+                yield from cls._screen_text(item)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                yield from cls._screen_text(item)
+
+    def embed(self, pipeline_result: Any) -> Dict[int, float]:
+        """Embed a pipeline result's text as a normalised hashed token-count vector"""
+        counts = Counter(
+            zlib.crc32(token.encode()) % self.dim
+            for text in self._screen_text(pipeline_result)
+            for token in _TOKEN_RE.findall(text)
+        )
+        norm = math.sqrt(sum(count * count for count in counts.values()))
+        return {bucket: count / norm for bucket, count in counts.items()} if norm else {}
+
+    @staticmethod
+    def _similarity(a: Dict[int, float], b: Dict[int, float]) -> float:
+        """Cosine similarity of two normalised embeddings"""
+        if len(a) > len(b):
+            a, b = b, a
+        return sum(weight * b.get(bucket, 0.0) for bucket, weight in a.items())
+
+    def lookup(self, partition: Tuple, embedding: Dict[int, float]) -> Optional[Dict[str, Any]]:
+        """Return a copy of the closest cached perception in the partition, or None below the threshold"""
+        best_id, best_score = None, self.threshold
+        for row_id, (entry_partition, entry_embedding, _) in self._entries.items():
+            if entry_partition != partition:
+                continue
+            score = self._similarity(entry_embedding, embedding)
+            if score >= best_score:
+                best_id, best_score = row_id, score
+        if best_id is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(best_id)
+        logger.info(f"♻️ Perception cache hit (similarity {best_score:.3f})")
+        return copy.deepcopy(self._entries[best_id][2])
+
+    def add(self, partition: Tuple, embedding: Dict[int, float], perception: Dict[str, Any]):
+        """Store a perception result, evicting the least recently used entry when full"""
+        self._entries[self._next_id] = (partition, embedding, copy.deepcopy(perception))
+        self._next_id += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
 class Perception:
     def __init__(self, model_manager):
         self.model = model_manager
         self.prompt_path = Path("agent/prompts/perception_prompt.txt")
+        self._prompt_template = load_prompt(self.prompt_path)
+        
+        # Combined perception+decision prefix, valid while both source prompts are unchanged
+        self._combined_for = None
+        self._combined_prefix = None
+
+    @property
+    def prompt_template(self) -> str:
+        """Perception prompt, re-read after edits when AGENT_PROMPT_RELOAD=1"""
+        if PROMPT_RELOAD:
+            self._prompt_template = load_prompt(self.prompt_path)
+        return self._prompt_template
 
     async def analyze(self, ctx, pipeline_result: Dict[str, Any], snapshot_type: str = "user_query") -> Dict[str, Any]:
         """
@@ -41,47 +182,25 @@ class Perception:
             #}
 
             # Build perception input
-            perception_input = {
-                "snapshot_type": snapshot_type,
-                "original_query": ctx.query,
-                "raw_input": ctx.query if snapshot_type == "user_query" else "",
-                "screen_snapshot": pipeline_result,
-                "completed_steps": [step.to_dict() for step in ctx.steps.values() if step.status == "completed"],
-                "failed_steps": [step.to_dict() for step in ctx.steps.values() if step.status == "failed"],
-                "screen_analysis": ctx.screen_analysis
-            }
+            perception_input = self._build_input(ctx, pipeline_result, snapshot_type)
             
             # Get prompt template
-            prompt_template = self.prompt_path.read_text(encoding="utf-8")
-            full_prompt = f"{prompt_template.strip()}\n\n```json\n{json.dumps(perception_input, indent=2)}\n```"
-            
-            # Log the prompt
-            logger_prompt(logger, "📝 Perception prompt:", full_prompt)
+            prompt_prefix = self.prompt_template
+            prompt_input = f"```json\n{dumps_compact(perception_input)}\n```"
             
+            # Log the prompt (joining the multi-KB prompt only when it is logged)
+            if ctx.trace_level == "verbose" and logger.isEnabledFor(PROMPT_BLOCK):
+                logger_prompt(logger, "📝 Perception prompt:", f"{prompt_prefix}\n\n{prompt_input}")
             
-            # Get LLM response
-            response = await self.model.generate_text(prompt=full_prompt)
-
-            #logger_json_block(logger, "Perception Response", response, 3000)
             
-            # Parse response using robust parser
-            perception = parse_llm_json(response, required_keys=[
-                'entities',
-                'result_requirement',
-                'original_goal_achieved',
-                'reasoning',
-                'local_goal_achieved',
-                'local_reasoning',
-                'last_tooluse_summary',
-                'solution_summary',
-                'confidence',
-                'route',
-                'open_windows',
-                'screen_analysis'
-            ])
+            # Get LLM response, parsed with the robust parser; the instructions prefix is identical across turns and cached
+            perception = await self.model.generate_parsed(
+                prompt_input, partial(parse_llm_json, required_keys=PERCEPTION_KEYS), prefix=prompt_prefix
+            )
             
             # Log perception results
-            logger_json_block(logger, "Perception Results", perception, 3000)
+            if logger.isEnabledFor(JSON_BLOCK):
+                logger_json_block(logger, "Perception Results", perception, 3000)
             
             return perception
             
@@ -89,4 +208,74 @@ class Perception:
             logger.error(f"Perception analysis failed: {str(e)}")
             raise
 
+    def _build_input(self, ctx, pipeline_result: Dict[str, Any], snapshot_type: str) -> Dict[str, Any]:
+        """Build the perception input for the prompt"""
+        return {
+            "snapshot_type": snapshot_type,
+            "original_query": ctx.query,
+            "raw_input": ctx.query if snapshot_type == "user_query" else "",
+            "screen_snapshot": pipeline_result,
+            **ctx.prompt_history(),
+            "screen_analysis": ctx.screen_analysis
+        }
+
+    @staticmethod
+    def _parse_combined(response: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Split a combined response into (perception, decision), validating both"""
+        combined = parse_llm_json(response, required_keys=["perception", "decision"])
+        perception, decision = combined["perception"], combined["decision"]
+        if not isinstance(perception, dict) or not isinstance(decision, dict):
+            raise JsonParsingError("Combined response parts must be JSON objects")
+        validate_required_keys(perception, PERCEPTION_KEYS)
+        if perception.get("route") != "summarize":
+            validate_required_keys(decision, DECISION_KEYS)
+        return perception, decision
+
+    async def analyze_and_decide(self, ctx, pipeline_result: Dict[str, Any], decision_module,
+                                 snapshot_type: str = "user_query") -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Analyze current state and decide the next action in a single LLM call
+        
+        Args:
+            ctx: Agent context
+            pipeline_result: Result from pipeline analysis
+            decision_module: Decision instance providing the tool-list prompt
+            snapshot_type: Type of snapshot (user_query or step_result)
+            
+        Returns:
+            Tuple of (perception results, decision results); the decision is
+            meaningless when perception routes to summarize
+        """
+        try:
+            decision_prefix, available_tools = await decision_module.get_prompt_prefix()
+            perception_prefix = self.prompt_template
+            if self._combined_for != (perception_prefix, decision_prefix):
+                self._combined_prefix = (
+                    f"{perception_prefix}\n\n{_COMBINED_PROMPT_HEADER}\n\n"
+                    f"{decision_prefix}\n\n{_COMBINED_PROMPT_FOOTER}"
+                )
+                self._combined_for = (perception_prefix, decision_prefix)
+            prompt_prefix = self._combined_prefix
+            
+            combined_input = self._build_input(ctx, pipeline_result, snapshot_type)
+            combined_input["available_tools"] = available_tools
+            prompt_input = f"```json\n{dumps_compact(combined_input)}\n```"
+            
+            if ctx.trace_level == "verbose" and logger.isEnabledFor(PROMPT_BLOCK):
+                logger_prompt(logger, "📝 Perception+Decision prompt:", f"{prompt_prefix}\n\n{prompt_input}")
+            
+            perception, decision = await self.model.generate_parsed(
+                prompt_input, self._parse_combined, prefix=prompt_prefix
+            )
+            
+            if logger.isEnabledFor(JSON_BLOCK):
+                logger_json_block(logger, "Perception Results", perception, 3000)
+                logger_json_block(logger, "Decision Results", decision)
+            
+            return perception, decision
+            
+        except Exception as e:
+            logger.error(f"Combined perception/decision failed: {str(e)}")
+            raise
+
    
\ No newline at end of file
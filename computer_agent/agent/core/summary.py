@@ -1,15 +1,18 @@
 import os
-import json
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any, Optional
-from agent.models.mode_manager import ModelManager
-from config.log_config import setup_logging, logger_json_block
+from typing import TYPE_CHECKING, Dict, Any, Optional
+from config.log_config import setup_logging, logger_json_block, JSON_BLOCK
+from agent.utils.prompt_loader import load_prompt, PROMPT_RELOAD
+from agent.utils.json_parser import dumps_compact
+
+if TYPE_CHECKING:
+    from agent.models.mode_manager import ModelManager
 
 logger = setup_logging(__name__)
 
 class Summary:
-    def __init__(self, model_manager: ModelManager, prompt_path: str = "agent/prompts/summary_prompt.txt"):
+    def __init__(self, model_manager: "ModelManager", prompt_path: str = "agent/prompts/summary_prompt.txt"):
         """
         Initialize the summary module
         
@@ -23,6 +26,16 @@ class Summary:
         # Verify prompt file exists
         if not Path(self.prompt_path).exists():
             raise FileNotFoundError(f"Summary prompt file not found: {self.prompt_path}")
+        
+        # Read prompt template once
+        self._prompt_template = load_prompt(self.prompt_path)
+
+    @property
+    def prompt_template(self) -> str:
+        """Summary prompt, re-read after edits when AGENT_PROMPT_RELOAD=1"""
+        if PROMPT_RELOAD:
+            self._prompt_template = load_prompt(self.prompt_path)
+        return self._prompt_template
 
     async def summarize(self, query: str, ctx, latest_perception: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -37,41 +50,42 @@ class Summary:
             dict: Final plan with summary
         """
         try:
-            # Read prompt template
-            with open(self.prompt_path, 'r', encoding='utf-8') as f:
-                prompt_template = f.read()
-                
+            prompt_template = self.prompt_template
             if not prompt_template:
                 raise ValueError(f"Summary prompt file is empty: {self.prompt_path}")
 
             # Build summary input
             summary_input = {
                 "original_query": query,
-                "completed_steps": [step.to_dict() for step in ctx.steps.values() if step.status == "completed"],
-                "failed_steps": [step.to_dict() for step in ctx.steps.values() if step.status == "failed"],
+                "completed_steps": ctx.completed_step_dicts,
+                "failed_steps": ctx.failed_step_dicts,
                 "perception": latest_perception
             }
 
             # Format full prompt
             full_prompt = (
                 f"Current Time: {datetime.utcnow().isoformat()}\n\n"
-                f"{prompt_template.strip()}\n\n"
-                f"{json.dumps(summary_input, indent=2)}"
+                f"{prompt_template}\n\n"
+                f"{dumps_compact(summary_input)}"
             )
 
             # Generate summary
             summary = await self.model.generate_text(prompt=full_prompt)
             
+            # Persist the session off the event loop
+            summary_path = await ctx.save_summary_async()
+            
             # Create final plan
             final_plan = {
                 "status": "success",
                 "session_id": ctx.session_id,
                 "summary": summary,
-                "summary_path": ctx.save_summary(),
-                "steps": [step.to_dict() for step in ctx.steps.values()]
+                "summary_path": summary_path,
+                "steps": ctx.steps_snapshot()
             }
 
-            logger_json_block(logger, "Final plan", final_plan)
+            if logger.isEnabledFor(JSON_BLOCK):
+                logger_json_block(logger, "Final plan", final_plan)
             return final_plan
 
         except Exception as e:
@@ -80,5 +94,5 @@ class Summary:
                 "status": "failed",
                 "session_id": ctx.session_id,
                 "error": f"Summary generation failed: {str(e)}",
-                "steps": [step.to_dict() for step in ctx.steps.values()]
+                "steps": ctx.steps_snapshot()
             }
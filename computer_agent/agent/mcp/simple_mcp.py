@@ -5,12 +5,61 @@ import asyncio
 import json
 import logging
 import aiohttp
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, NamedTuple, Optional, Sequence, Tuple
 from pathlib import Path
 from config.log_config import setup_logging
+from utils.helpers import debug_only
+
+try:
+    import orjson
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
 
 logger = setup_logging(__name__)
 
+
+class ToolMeta(NamedTuple):
+    """Static facts about a Windows MCP tool"""
+    mutates_screen: bool = True  # False when the tool cannot change what is on screen
+    idempotent: bool = False  # True when the same params always give the same result
+
+
+# Unknown tools are assumed to change the screen
+DEFAULT_TOOL_META = ToolMeta()
+
+# Read-only query tools of the Windows MCP server; only the machine facts are idempotent
+TOOL_META: Dict[str, ToolMeta] = {
+    **{
+        name: ToolMeta(mutates_screen=False)
+        for name in (
+            "introspect", "tree", "get_windows", "print_windows_summary", "refresh_windows",
+            "hover", "inspect", "detect",
+        )
+    },
+    **{name: ToolMeta(mutates_screen=False, idempotent=True) for name in ("computer", "user", "keys")},
+}
+
+
+@debug_only
+def _print_tools(tools: Dict[str, Any]) -> None:
+    """Print the server's tool catalog (debug mode only)"""
+    print("\n=== Available MCP Tools ===")
+    for category, category_tools in tools.items():
+        print(f"\n{category.upper()}:")
+        for tool_name, tool_info in category_tools.items():
+            print(f"  - {tool_name}: {tool_info['description']}")
+            if tool_info.get('params'):
+                print(f"    Params: {tool_info['params']}")
+    print("\n========================\n")
+
+
 class SimpleMCP:
     def __init__(self, server_config: Dict[str, Any]):
         """
@@ -25,6 +74,9 @@ class SimpleMCP:
         self.session = None
         self.initialized = False
         self.tools = {}
+        self.version = 0  # Bumped on every (re)initialize so callers can invalidate tool caches
+        self.tool_meta: Dict[str, ToolMeta] = TOOL_META
+        self.connect_timeout = 5.0  # Seconds to wait for the server's "connected" SSE event
         
     async def initialize(self) -> None:
         """Initialize the MCP client and connect to server"""
@@ -32,35 +84,17 @@ class SimpleMCP:
             return
             
         try:
-            # Create aiohttp session
-            self.session = aiohttp.ClientSession()
+            # Create aiohttp session (kept for the client's lifetime and reused by every call)
+            if self.session is None or self.session.closed:
+                connector = aiohttp.TCPConnector(limit_per_host=32, ttl_dns_cache=300, keepalive_timeout=60)
+                self.session = aiohttp.ClientSession(connector=connector)
             
-            # Connect to SSE endpoint to get initial tools
-            async with self.session.get(f"{self.base_url}/sse") as resp:
-                async for line in resp.content:
-                    if line:
-                        try:
-                            decoded = line.decode().strip()
-                            if decoded.startswith("data: "):
-                                data = json.loads(decoded[6:])
-                                if data.get('status') == 'connected':
-                                    self.tools = data.get('tools', {})
-                                    self.initialized = True
-                                    
-                                    # Print available tools
-                                    print("\n=== Available MCP Tools ===")
-                                    for category, tools in self.tools.items():
-                                        print(f"\n{category.upper()}:")
-                                        for tool_name, tool_info in tools.items():
-                                            print(f"  - {tool_name}: {tool_info['description']}")
-                                            if tool_info.get('params'):
-                                                print(f"    Params: {tool_info['params']}")
-                                    print("\n========================\n")
-                                    break
-                        except Exception as e:
-                            logger.error(f"Failed to parse SSE data: {e}")
-                            continue
+            # Wait (bounded) for the server's "connected" event instead of a fixed delay
+            await asyncio.wait_for(self._await_connected(), timeout=self.connect_timeout)
+            if not self.initialized:
+                raise ConnectionError("MCP server closed the SSE stream before reporting ready")
             
+            self.version += 1
             logger.info(f"SimpleMCP initialized with {len(self.tools)} tools")
             
         except Exception as e:
@@ -69,6 +103,59 @@ class SimpleMCP:
                 await self.session.close()
             raise
             
+    async def _await_connected(self) -> None:
+        """Read SSE events until the server reports it is connected, storing its tools"""
+        # Connect to SSE endpoint to get initial tools; read whole events, not lines
+        async with self.session.get(f"{self.base_url}/sse") as resp:
+            reader = resp.content
+            while not reader.at_eof():
+                try:
+                    event = await reader.readuntil(b"\n\n")
+                except asyncio.IncompleteReadError:
+                    break
+                data_start = event.find(b"data: ")
+                if data_start == -1:
+                    continue
+                try:
+                    data = _loads(event[data_start + 6:])
+                except Exception as e:
+                    logger.error(f"Failed to parse SSE data: {e}")
+                    continue
+                if data.get('status') == 'connected':
+                    self.tools = data.get('tools', {})
+                    self.initialized = True
+                    _print_tools(self.tools)
+                    break
+
+    async def ensure_connected(self) -> None:
+        """Connect if needed, reusing the open session when it is still usable"""
+        if self.initialized and self.session is not None and not self.session.closed:
+            return
+        self.initialized = False
+        await self.initialize()
+
+    async def ping(self, timeout: float = 2.0) -> bool:
+        """Cheap health check against the server's /tools endpoint"""
+        if self.session is None or self.session.closed:
+            return False
+        try:
+            async with self.session.get(
+                f"{self.base_url}/tools", timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                return response.status == 200
+        except Exception as e:
+            logger.warning(f"MCP health check failed: {str(e)}")
+            return False
+
+    async def reconnect(self) -> None:
+        """Drop the current session and connect again"""
+        await self.shutdown()
+        await self.initialize()
+
+    def get_tool_meta(self, tool_name: str) -> ToolMeta:
+        """Get static metadata for a tool, assuming the worst for unknown tools"""
+        return self.tool_meta.get(tool_name, DEFAULT_TOOL_META)
+            
     async def list_tools(self) -> Dict:
         """Get list of available tools from the server"""
         try:
@@ -89,21 +176,108 @@ class SimpleMCP:
         Returns:
             Result of the tool execution
         """
-        if not self.initialized:
-            raise RuntimeError("SimpleMCP not initialized")
+        await self.ensure_connected()
             
         try:
             data = {"command": tool_name, "params": arguments}
-            async with self.session.post(f"{self.base_url}/command", json=data) as response:
-                result = await response.json()
+            async with self.session.post(
+                f"{self.base_url}/command", data=_dumps(data), headers=_JSON_HEADERS
+            ) as response:
+                # Parse the raw body directly; skips aiohttp's decode-to-str step
+                result = _loads(await response.read())
                 logger.info(f"Tool {tool_name} executed with result: {result}")
                 return result
         except Exception as e:
             logger.error(f"Failed to execute tool {tool_name}: {str(e)}")
             raise
             
+    async def execute_tools_batch(self, calls: Sequence[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        """
+        Execute independent tools concurrently over the shared session
+        
+        Args:
+            calls: (tool_name, arguments) pairs with no ordering between them
+            
+        Returns:
+            Results in the same order as calls
+        """
+        return await asyncio.gather(*(self.execute_tool(name, args) for name, args in calls))
+            
     async def shutdown(self) -> None:
         """Shutdown the MCP client"""
         if self.session:
             await self.session.close()
-            self.initialized = False
\ No newline at end of file
+            self.session = None
+            self.initialized = False
+
+
+class SimpleMCPPool:
+    """
+    Shares one SimpleMCP client per server config across agents/sessions.
+
+    Clients are reference counted: the first acquire initializes the
+    connection and the last release shuts it down.
+    """
+
+    def __init__(self):
+        self._clients: Dict[tuple, SimpleMCP] = {}
+        self._refcounts: Dict[tuple, int] = {}
+        self._lock: Optional[asyncio.Lock] = None
+
+    @staticmethod
+    def _key(server_config: Dict[str, Any]) -> tuple:
+        """Frozen, hashable form of a server config"""
+        return tuple(sorted((key, repr(value)) for key, value in server_config.items()))
+
+    def get(self, server_config: Dict[str, Any]) -> SimpleMCP:
+        """Get the shared client for a config without connecting it"""
+        key = self._key(server_config)
+        client = self._clients.get(key)
+        if client is None:
+            client = SimpleMCP(server_config)
+            self._clients[key] = client
+            self._refcounts[key] = 0
+        return client
+
+    async def acquire(self, server_config: Dict[str, Any]) -> SimpleMCP:
+        """Get the shared client for a config, initializing it on first use"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            client = self.get(server_config)
+            key = self._key(server_config)
+            if self._refcounts[key] == 0:
+                await client.initialize()
+            self._refcounts[key] += 1
+            return client
+
+    async def reconnect(self, server_config: Dict[str, Any]) -> SimpleMCP:
+        """
+        Reconnect a shared client that failed a health check
+        
+        Runs under the pool lock and pings again first, so when several holders
+        see the same failure only the first one replaces the session.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            client = self.get(server_config)
+            if not await client.ping():
+                await client.reconnect()
+            return client
+
+    async def release(self, server_config: Dict[str, Any]) -> None:
+        """Release a client; it is shut down once no holders remain"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            key = self._key(server_config)
+            if self._refcounts.get(key, 0) == 0:
+                return
+            self._refcounts[key] -= 1
+            if self._refcounts[key] == 0:
+                await self._clients[key].shutdown()
+
+
+# Process-wide pool used by ComputerAgent
+mcp_pool = SimpleMCPPool()
@@ -1,23 +1,58 @@
 """
 Model Manager - Handles LLM interactions
 """
+import asyncio
+import hashlib
 import os
-from typing import Optional
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 from config.log_config import setup_logging
 
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    diskcache = None
+    DISKCACHE_AVAILABLE = False
+
 logger = setup_logging(__name__)
 
+# Response cache toggle (off by default: the agent drives a live screen, so a replayed
+# response can be stale); set AGENT_LLM_CACHE=1 to reuse responses for identical prompts
+LLM_CACHE_ENABLED = os.getenv("AGENT_LLM_CACHE", "0") == "1"
+
 class ModelManager:
-    def __init__(self, api_key: Optional[str] = None, model: str = "gemini-2.0-flash"):
+    def __init__(self, api_key: Optional[str] = None, model: str = "gemini-2.0-flash",
+                 prefix_cache_ttl: int = 3600,
+                 cache_size: int = 512, cache_dir: Optional[str] = None):
         """
         Initialize the model manager
         
         Args:
             api_key: Google API key (optional, can use environment variable)
             model: Model name to use
+            prefix_cache_ttl: Lifetime in seconds of server-side cached prompt prefixes
+            cache_size: Number of responses kept in the in-memory response cache
+            cache_dir: Directory for a persistent response cache (needs diskcache;
+                       defaults to AGENT_LLM_CACHE_DIR)
         """
         self.model_name = model
+        self.prefix_cache_ttl = prefix_cache_ttl
+        # prefix hash -> (model, monotonic time after which its cached content must be recreated, cached content);
+        # model and cached content are None when the prefix is sent inline
+        self._prefix_models: Dict[str, Tuple[Optional["genai.GenerativeModel"], float, Any]] = {}
+        self._prefix_lock = threading.Lock()  # Models are resolved on worker threads
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, str]" = OrderedDict()  # sha256 key -> response text
+        self._disk_cache = None
+        cache_dir = cache_dir or os.getenv("AGENT_LLM_CACHE_DIR")
+        if LLM_CACHE_ENABLED and cache_dir and DISKCACHE_AVAILABLE:
+            self._disk_cache = diskcache.Cache(cache_dir)
         api_key = api_key or os.getenv("GEMINI_API_KEY")
         if not api_key:
             raise ValueError("Google API key not provided and GEMINI_API_KEY environment variable not set")
@@ -25,19 +60,140 @@ class ModelManager:
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel(model)
         
-    async def generate_text(self, prompt: str) -> str:
+    def _model_for_prefix(self, prefix: Optional[str], stale=None):
+        """
+        Get a model whose cached content is the given stable prompt prefix
+        
+        The prefix is uploaded once as cached content when the API accepts it
+        (it has a minimum size) and then precedes every call's prompt as user
+        content, as it did when it was sent inline. Cached content is uploaded
+        again shortly before its TTL runs out, or when `stale` (a model whose
+        content the server no longer has) is still the current model for the
+        prefix; the content it replaces is deleted.
+        
+        Returns:
+            The model, or None when the prefix has to be sent inline with the prompt
+        """
+        if not prefix:
+            return None
+        
+        prefix_hash = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        with self._prefix_lock:
+            entry = self._prefix_models.get(prefix_hash)
+            if entry is not None and entry[0] is not stale and time.monotonic() < entry[1]:
+                return entry[0]
+            try:
+                cached = genai.caching.CachedContent.create(
+                    model=self.model_name,
+                    display_name=f"prefix-{prefix_hash[:16]}",
+                    contents=[prefix],
+                    ttl=timedelta(seconds=self.prefix_cache_ttl),
+                )
+                model = genai.GenerativeModel.from_cached_content(cached_content=cached)
+                # Renew a little early so no call races the server-side expiry
+                expires = time.monotonic() + self.prefix_cache_ttl * 0.9
+            except Exception as e:
+                logger.debug(f"Prompt prefix not cached server-side ({str(e)}), sending it inline")
+                cached, model, expires = None, None, float("inf")
+            self._prefix_models[prefix_hash] = (model, expires, cached)
+        
+        if entry is not None and entry[2] is not None:
+            self._delete_cached_content(entry[2])
+        return model
+
+    @staticmethod
+    def _delete_cached_content(cached) -> None:
+        """Delete replaced cached content server-side rather than leaving it until its TTL"""
+        try:
+            cached.delete()
+        except Exception as e:
+            # Already expired or deleted
+            logger.debug(f"Could not delete cached prompt prefix {cached.name}: {str(e)}")
+        
+    async def generate_text(self, prompt: str, prefix: Optional[str] = None) -> str:
         """
         Generate text using the LLM
         
         Args:
-            prompt: Input prompt
+            prompt: Input prompt (the per-call part when prefix is given)
+            prefix: Stable prompt prefix shared across calls, cached by the provider
             
         Returns:
             Generated text
         """
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            # The SDK call blocks for the whole round-trip, so keep it off the event loop
+            return await asyncio.to_thread(self._generate_sync, prompt, prefix)
         except Exception as e:
             logger.error(f"Failed to generate text: {str(e)}")
             raise
+
+    async def generate_parsed(self, prompt: str, parse: Callable[[str], Any], prefix: Optional[str] = None) -> Any:
+        """
+        Generate text using the LLM and parse it
+        
+        When the response cache is enabled, a response is stored only after
+        `parse` accepted it, so a malformed or truncated reply is never replayed.
+        
+        Args:
+            prompt: Input prompt (the per-call part when prefix is given)
+            parse: Parses and validates the response text, raising when it is unusable
+            prefix: Stable prompt prefix shared across calls, cached by the provider
+            
+        Returns:
+            Whatever parse returns for the response
+        """
+        key = self._cache_key(prompt, prefix) if LLM_CACHE_ENABLED else None
+        if key is not None:
+            cached = self._cache_get(key)
+            if cached is not None:
+                return parse(cached)
+        
+        text = await self.generate_text(prompt, prefix)
+        result = parse(text)
+        if key is not None:
+            self._cache_put(key, text)
+        return result
+
+    def _generate_sync(self, prompt: str, prefix: Optional[str]) -> str:
+        """Blocking generate_content call (resolving the prefix model may also hit the API)"""
+        model = self._model_for_prefix(prefix)
+        if model is None:
+            return self._generate_inline(prompt, prefix)
+        try:
+            return model.generate_content(prompt).text
+        except google_exceptions.NotFound:
+            # The cached prefix content is gone server-side; upload it again once
+            model = self._model_for_prefix(prefix, stale=model)
+            if model is None:
+                return self._generate_inline(prompt, prefix)
+            return model.generate_content(prompt).text
+
+    def _generate_inline(self, prompt: str, prefix: Optional[str]) -> str:
+        """Send the prefix and prompt as one user message"""
+        full_prompt = f"{prefix}\n\n{prompt}" if prefix else prompt
+        return self.model.generate_content(full_prompt).text
+
+    def _cache_key(self, prompt: str, prefix: Optional[str]) -> str:
+        """SHA-256 of model, prefix and prompt"""
+        return hashlib.sha256(f"{self.model_name}\0{prefix or ''}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        """Look a response up in memory, then on disk"""
+        text = self._cache.get(key)
+        if text is not None:
+            self._cache.move_to_end(key)
+            return text
+        if self._disk_cache is not None:
+            text = self._disk_cache.get(key)
+            if text is not None:
+                self._cache_put(key, text, persist=False)
+        return text
+
+    def _cache_put(self, key: str, text: str, persist: bool = True) -> None:
+        """Store a response, evicting the least recently used one when full"""
+        self._cache[key] = text
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        if persist and self._disk_cache is not None:
+            self._disk_cache.set(key, text)
@@ -1,40 +1,12 @@
-import os
 import json
-from functools import wraps
 import networkx as nx
 from typing import Dict, Any, Optional
 import logging
+# Configuration and debug helpers live in utils.helpers; re-exported for agent code
+from utils.helpers import load_configuration, clear_configuration_cache, debug_only, debug_print
 
 logger = logging.getLogger(__name__)
 
-def load_configuration():
-    """Load and validate configuration from config.json"""
-    config_path = "utils/config.json"
-    
-    if not os.path.exists(config_path):
-        print(f"Error: Configuration file '{config_path}' not found!")
-        return None
-    
-    try:
-        with open(config_path, "r") as f:
-            config = json.load(f)
-        return config
-    except Exception as e:
-        print(f"Error loading configuration: {e}")
-        return None
-
-def debug_only(func):
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        config = load_configuration()
-        if config and config.get("mode", "").lower() == "debug":
-            return func(*args, **kwargs)
-    return wrapper
-
-@debug_only
-def debug_print(*args, **kwargs):
-    print(*args, **kwargs)
-
 def render_graph(graph: nx.DiGraph, depth: int = 1, title: str = "Computer Agent", color: str = "blue"):
     """Render the execution graph with step status and details
     
@@ -2,6 +2,13 @@ import json
 import re
 from json_repair import repair_json
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
 class JsonParsingError(Exception):
     pass
 
@@ -24,9 +31,19 @@ def validate_required_keys(obj: dict, required_keys: list[str]):
         if key not in obj:
             raise JsonParsingError(f"Missing required key: {key}")
 
+def dumps_compact(obj) -> str:
+    """Compact JSON for LLM prompt inputs (orjson when available)."""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode()
+        except TypeError:
+            pass
+    return json.dumps(obj, separators=(",", ":"), default=str)
+
 def _parse_and_validate(raw_json: str, required_keys: list[str] = None) -> dict:
     """Helper to parse and optionally validate required schema."""
-    parsed = json.loads(raw_json)
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers' handling is unchanged
+    parsed = orjson.loads(raw_json) if ORJSON_AVAILABLE else json.loads(raw_json)
     if required_keys:
         validate_required_keys(parsed, required_keys)
     return parsed
@@ -0,0 +1,19 @@
+"""
+Prompt template loading, cached per file version
+"""
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Union
+
+# Re-check prompt files for edits on every use (handy while iterating on prompts)
+PROMPT_RELOAD = os.getenv("AGENT_PROMPT_RELOAD", "0") == "1"
+
+@lru_cache(maxsize=16)
+def _read_prompt(path_str: str, mtime_ns: int) -> str:
+    """Read and strip a prompt file; mtime_ns only keys the cache"""
+    return Path(path_str).read_text(encoding="utf-8").strip()
+
+def load_prompt(path: Union[str, Path]) -> str:
+    """Load a prompt template, reading the file again only after it changes"""
+    return _read_prompt(str(path), os.stat(path).st_mtime_ns)
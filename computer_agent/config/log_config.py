@@ -1,9 +1,21 @@
+import atexit
 import logging
+import os
+import queue
 import sys
+import threading
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
 from pathlib import Path
 import json
 from datetime import datetime
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
 # Create custom log levels for JSON blocks and prompts
 JSON_BLOCK = 25  # Between INFO (20) and WARNING (30)
 PROMPT_BLOCK = 26  # Between INFO (20) and WARNING (30)
@@ -12,6 +24,43 @@ logging.addLevelName(CODE_BLOCK, 'CODE_BLOCK')
 logging.addLevelName(JSON_BLOCK, 'JSON_BLOCK')
 logging.addLevelName(PROMPT_BLOCK, 'PROMPT_BLOCK')
 
+# Indent JSON blocks for reading; AGENT_PRETTY_LOGS=0 logs them as single-line JSON instead
+_PRETTY_LOGS = os.environ.get("AGENT_PRETTY_LOGS", "1") == "1"
+
+# Set once the first setup_logging call has installed the handlers
+_INITIALIZED = False
+
+# Buffered file records are written at least this often (seconds), so the log can be tailed
+_FLUSH_INTERVAL = 1.0
+
+# Block separators and section headers, built once
+_SEP = "=" * 80
+_SEP_NL = "\n" + _SEP + "\n"
+_CODE_HEADER = f"🔧 Code:\n{_SEP}\n"
+_OUTPUT_HEADER = f"{_SEP_NL}📊 Output:\n{_SEP}\n"
+
+# Block header templates, filled with % at call time
+_STEP_HEADER = "\n%s\n%%s %%s\n%s\n" % (_SEP, _SEP)
+_JSON_HEADER = "\n%s\n📌 %%s\n%s\n" % (_SEP, _SEP)
+_PROMPT_HEADER = "\n%s\n📝 %%s\n%s\n" % (_SEP, _SEP)
+
+# Markdown code block markers dropped from logged prompts
+_PROMPT_SKIP_LINES = frozenset(('```json', '```', '---'))
+
+def _dumps(obj, indent: bool = False, sort_keys: bool = False) -> str:
+    """JSON text via orjson when it is installed and can encode the data"""
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, option=option).decode()
+        except TypeError:
+            pass
+    return json.dumps(obj, indent=2 if indent else None, sort_keys=sort_keys)
+
 def log_step(title: str, payload=None, symbol: str = "🟢"):
     """Log a major step in the execution flow with visual emphasis
     
@@ -20,23 +69,17 @@ def log_step(title: str, payload=None, symbol: str = "🟢"):
         payload: Optional data to log with the step
         symbol: Emoji symbol to use (default: 🟢)
     """
-    # Create a separator
-    separator = "=" * 80
-    
     # Create the complete message
-    complete_message = f"\n{separator}\n{symbol} {title}\n{separator}\n"
+    parts = [_STEP_HEADER % (symbol, title)]
     
     # Add payload if provided
     if payload:
-        if isinstance(payload, dict):
-            json_str = json.dumps(payload, indent=2, sort_keys=False)
-            complete_message += f"{json_str}\n"
-        else:
-            complete_message += f"{payload}\n"
-        complete_message += f"{separator}\n"
+        parts.append(_dumps(payload, indent=True) if isinstance(payload, dict) else str(payload))
+        parts.append(f"\n{_SEP}\n")
+    parts.append("\n")
     
-    # Print to console
-    print(complete_message)
+    # Print to console in one write
+    sys.stdout.write("".join(parts))
 
 def setup_logging(module_name: str):
     """
@@ -44,6 +87,10 @@ def setup_logging(module_name: str):
     Args:
         module_name: Name of the module for log messages
     """
+    global _INITIALIZED
+    if _INITIALIZED:
+        return logging.getLogger(module_name)
+    
     # Create logs directory if it doesn't exist
     log_dir = Path(__file__).parent.parent / 'logs'
     log_dir.mkdir(exist_ok=True)
@@ -54,17 +101,51 @@ def setup_logging(module_name: str):
     # Format to include timestamp, level, module name, function name, line number
     log_format = '%(asctime)s - %(levelname)s - %(module)s:%(funcName)s:%(lineno)d - %(message)s'
     
-    logging.basicConfig(
-        level=logging.INFO,
-        format=log_format,
-        handlers=[
-            logging.FileHandler(log_file, mode='w', encoding='utf-8'),
-            #logging.StreamHandler(sys.stdout)  # Add console output
-        ]
-    )
+    # Leave logging alone if something else configured it first
+    if not logging.root.handlers:
+        file_handler = logging.FileHandler(log_file, mode='a', encoding='utf-8')
+        file_handler.setFormatter(logging.Formatter(log_format))
+        logging.basicConfig(
+            level=logging.INFO,
+            handlers=[
+                _queued(file_handler),
+                #logging.StreamHandler(sys.stdout)  # Add console output
+            ]
+        )
+    _INITIALIZED = True
 
     return logging.getLogger(module_name)
 
+def _queued(target: logging.Handler) -> logging.Handler:
+    """Hand records to a background thread that writes them to target in batches
+    
+    The returned QueueHandler only enqueues; a QueueListener thread formats the
+    records and feeds a MemoryHandler that flushes to target every 64 records,
+    on WARNING and above, every _FLUSH_INTERVAL seconds, and at exit. A crash
+    therefore loses at most about a second of INFO records.
+    """
+    buffered = MemoryHandler(capacity=64, flushLevel=logging.WARNING, target=target)
+    records = queue.SimpleQueue()
+    listener = QueueListener(records, buffered)
+    listener.start()
+    
+    stopped = threading.Event()
+    interval = _FLUSH_INTERVAL
+    def flush_periodically():
+        while not stopped.wait(interval):
+            buffered.flush()
+    threading.Thread(target=flush_periodically, name="log-flush", daemon=True).start()
+    
+    def stop():
+        stopped.set()
+        listener.stop()
+    # Drain the queue before logging.shutdown() flushes and closes the handlers
+    atexit.register(stop)
+    
+    handler = QueueHandler(records)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    return handler
+
 
 def logger_json_block(logger, message, data, char_limit: int = 500):
     """Log JSON data in a clean block format without timestamps
@@ -72,45 +153,25 @@ def logger_json_block(logger, message, data, char_limit: int = 500):
     Args:
         logger: Logger instance
         message: Message to display
-        data: Data to log
+        data: Data to log, or a zero-arg callable producing it (only called when logged)
         char_limit: Maximum number of characters to display (default: 500)
     """
+    if not logger.isEnabledFor(JSON_BLOCK):
+        return
     try:
-        # Create a separator
-        separator = "=" * 80
+        if callable(data):
+            data = data()
         
-        # First convert to JSON string without indentation to check length
-        raw_json_str = json.dumps(data, sort_keys=False)
-        
-        # If raw JSON is too long, truncate the data itself
-        if len(raw_json_str) > char_limit:
-            # Create a truncated version of the data
-            truncated_data = {}
-            current_length = 0
-            for key, value in data.items():
-                # Add 2 for quotes and comma
-                key_length = len(json.dumps(key)) + 2
-                value_length = len(json.dumps(value)) + 2
-                
-                if current_length + key_length + value_length > char_limit:
-                    break
-                    
-                truncated_data[key] = value
-                current_length += key_length + value_length
-            
-            # Add truncation info
-            truncated_data["_truncated"] = True
-            truncated_data["_total_length"] = len(raw_json_str)
-            truncated_data["_truncated_keys"] = list(set(data.keys()) - set(truncated_data.keys()))
-            
-            # Use truncated data
-            data = truncated_data
-        
-        # Now format the (possibly truncated) data with indentation
-        json_str = json.dumps(data, indent=2, sort_keys=False)
+        # Serialize once without indentation; over the limit, cut that string instead of re-encoding
+        raw_json = _dumps(data)
+        if len(raw_json) > char_limit:
+            keys = f", {len(data)} keys" if isinstance(data, dict) else ""
+            json_str = f"{raw_json[:char_limit]}\n...[truncated, {len(raw_json)} chars total{keys}]"
+        else:
+            json_str = _dumps(data, indent=_PRETTY_LOGS)
         
         # Create the complete message
-        complete_message = f"\n{separator}\n📌 {message}\n{separator}\n{json_str}\n{separator}\n"
+        complete_message = "".join((_JSON_HEADER % (message,), json_str, _SEP_NL))
         
         # Log using the custom level
         logger.log(JSON_BLOCK, complete_message)
@@ -120,24 +181,16 @@ def logger_json_block(logger, message, data, char_limit: int = 500):
 
 def logger_prompt(logger, message, prompt):
     """Log prompts in a clean, readable format without timestamps"""
+    if not logger.isEnabledFor(PROMPT_BLOCK):
+        return
     try:
-        # Create a separator
-        separator = "=" * 80
-        
-        # Create the complete message
-        prompt_lines = prompt.split('\n')
-        formatted_lines = []
-        for line in prompt_lines:
-            # Skip empty lines
-            if not line.strip():
-                continue
-            # Skip markdown code block markers
-            if line.strip() in ['```json', '```', '---']:
-                continue
-            # Add the line with proper indentation
-            formatted_lines.append(f"  {line}")
+        # Create the complete message, skipping empty lines and markdown code block markers
+        formatted_lines = [
+            f"  {line}" for line in prompt.split('\n')
+            if line.strip() and line.strip() not in _PROMPT_SKIP_LINES
+        ]
         
-        complete_message = f"\n{separator}\n📝 {message}\n{separator}\n" + "\n".join(formatted_lines) + f"\n{separator}\n"
+        complete_message = "".join((_PROMPT_HEADER % (message,), "\n".join(formatted_lines), _SEP_NL))
         
         # Log using the custom level
         logger.log(PROMPT_BLOCK, complete_message)
@@ -147,68 +200,89 @@ def logger_prompt(logger, message, prompt):
 
 def logger_code_block(logger, message, code, output=None):
     """Log code and its output in a clean, readable format"""
+    if not logger.isEnabledFor(CODE_BLOCK):
+        return
     try:
-        # Create a separator
-        separator = "=" * 80
-        
         # Create the complete message
-        complete_message = f"\n{separator}\n"
-        complete_message += f"📝 {message}\n"
-        complete_message += f"{separator}\n"
+        parts = [_PROMPT_HEADER % (message,)]
         
-        # Add code section
-        complete_message += "🔧 Code:\n"
-        complete_message += f"{separator}\n"
-        # Split code into lines and add proper indentation
-        code_lines = code.split('\n')
-        for line in code_lines:
-            complete_message += f"  {line}\n"
+        # Add code section, indenting every line
+        parts.append(_CODE_HEADER)
+        parts.extend(f"  {line}\n" for line in code.split('\n'))
         
         # Add output section if provided
         if output:
-            complete_message += f"\n{separator}\n"
-            complete_message += "📊 Output:\n"
-            complete_message += f"{separator}\n"
+            parts.append(_OUTPUT_HEADER)
             # Format output as JSON if it's a dictionary
             if isinstance(output, dict):
-                output_str = json.dumps(output, indent=2, sort_keys=True)
-                for line in output_str.split('\n'):
-                    complete_message += f"  {line}\n"
+                output_str = _dumps(output, indent=True, sort_keys=True)
+                parts.extend(f"  {line}\n" for line in output_str.split('\n'))
             else:
-                complete_message += f"  {output}\n"
+                parts.append(f"  {output}\n")
         
-        complete_message += f"{separator}\n"
+        parts.append(f"{_SEP}\n")
         
         # Log using the custom level
-        logger.log(CODE_BLOCK, complete_message)
+        logger.log(CODE_BLOCK, "".join(parts))
     except Exception as e:
         logger.error(f"Failed to format code block: {e}")
         logger.info(f"{message}: {code}")
 
+def _trim_for_display(data, char_limit: int):
+    """Cut leaf strings and containers that could never fit in char_limit characters
+    
+    Returns:
+        Tuple of (trimmed data, whether anything was cut)
+    """
+    # Every element takes at least 2 characters once indented
+    max_items = max(char_limit // 2, 1)
+    if isinstance(data, str):
+        if len(data) > char_limit:
+            return data[:char_limit], True
+        return data, False
+    if isinstance(data, dict):
+        trimmed, cut = {}, len(data) > max_items
+        for i, (key, value) in enumerate(data.items()):
+            if i >= max_items:
+                break
+            trimmed[key], value_cut = _trim_for_display(value, char_limit)
+            cut = cut or value_cut
+        return trimmed, cut
+    if isinstance(data, (list, tuple)):
+        trimmed, cut = [], len(data) > max_items
+        for value in data[:max_items]:
+            value, value_cut = _trim_for_display(value, char_limit)
+            trimmed.append(value)
+            cut = cut or value_cut
+        return trimmed, cut
+    return data, False
+
 def log_json_block(message: str, data: dict, char_limit: int = 500):
     """Print JSON data to screen in a clean block format
     
     Args:
         message: Message to display
-        data: Data to log
+        data: Data to log, or a zero-arg callable producing it (only called when printed)
         char_limit: Maximum number of characters to display (default: 500)
     """
     try:
-        # Create a separator
-        separator = "=" * 80
+        if callable(data):
+            data = data()
         
-        # Create the formatted JSON string
-        json_str = json.dumps(data, indent=2, sort_keys=False)
+        # Drop what can't be shown anyway, then create the formatted JSON string
+        data, trimmed = _trim_for_display(data, char_limit)
+        json_str = _dumps(data, indent=_PRETTY_LOGS)
         
         # Truncate if over limit
-        if len(json_str) > char_limit:
-            json_str = json_str[:char_limit] + "...\n[truncated, total length: " + str(len(json_str)) + " chars]"
+        if len(json_str) > char_limit or trimmed:
+            total = f"{len(json_str)}+" if trimmed else str(len(json_str))
+            json_str = json_str[:char_limit] + "...\n[truncated, total length: " + total + " chars]"
         
         # Create the complete message
-        complete_message = f"\n{separator}\n📌 {message}\n{separator}\n{json_str}\n{separator}\n"
+        complete_message = "".join((_JSON_HEADER % (message,), json_str, _SEP_NL, "\n"))
         
-        # Print to console
-        print(complete_message)
+        # Print to console in one write
+        sys.stdout.write(complete_message)
     except Exception as e:
         print(f"Failed to format JSON: {e}")
-        print(f"{message}: {data}")
\ No newline at end of file
+        print(f"{message}: {data}")
@@ -2,8 +2,12 @@
 Pipeline V1: Configuration Setup + YOLO/OCR Detection + Merging + Seraphine Grouping + Visualizations
 Building the complete pipeline step by step - with intelligent ID tracking and JSON export
 """
+import glob
 import os
+import shutil
+import threading
 import time
+import traceback
 import json
 import cv2
 import numpy as np
@@ -21,7 +25,7 @@ from utils.gemini_integration import run_gemini_analysis, integrate_gemini_resul
 from utils.pipeline_exporter import save_enhanced_pipeline_json
 from concurrent.futures import ThreadPoolExecutor
 from utils.parallel_processor import ParallelProcessor
-from utils.helpers import load_configuration, debug_print
+from utils.helpers import load_configuration, debug_print, debug_only
 
 # Import all the helper functions from pipeline_utils.py
 from .pipeline_utils import (
@@ -38,7 +42,28 @@ from .pipeline_utils import (
     display_enhanced_pipeline_summary
 )
 
-async def run_pipeline(image_path, mode="debug", output_dir=None):
+# Tracebacks are formatted only when the configured mode is debug
+_debug_print_exc = debug_only(traceback.print_exc)
+
+def _discard_output_dir(output_dir):
+    """Move output_dir aside (one rename) and delete it off the response path
+    
+    Also picks up <output_dir>.del.* leftovers from earlier processes, whose
+    daemon deletion thread died with them before finishing.
+    """
+    own_prefix = f"{output_dir}.del.{os.getpid()}."
+    doomed = [path for path in glob.glob(f"{glob.escape(output_dir)}.del.*") if not path.startswith(own_prefix)]
+    if os.path.exists(output_dir):
+        discarded = f"{own_prefix}{time.time_ns()}"
+        os.rename(output_dir, discarded)
+        os.makedirs(output_dir, exist_ok=True)
+        doomed.append(discarded)
+    if doomed:
+        threading.Thread(
+            target=lambda: [shutil.rmtree(path, ignore_errors=True) for path in doomed], daemon=True
+        ).start()
+
+async def run_pipeline(image_path, mode="debug", output_dir=None, image=None):
     """
     Run the complete pipeline on an image.
     
@@ -46,6 +71,8 @@ async def run_pipeline(image_path, mode="debug", output_dir=None):
         image_path (str): Path to the input image
         mode (str): "debug" for detailed output, "deploy_mcp" for production
         output_dir (str): Custom output directory path (optional)
+        image (np.ndarray): Already-captured BGR frame of image_path (optional);
+                            skips re-reading and decoding the file for detection
     
     Returns:
         dict: Pipeline results including:
@@ -57,37 +84,49 @@ async def run_pipeline(image_path, mode="debug", output_dir=None):
     """
     pipeline_start = time.time()
     
-    config = load_configuration()
-    if not config:
-        return None
+    # Read and decode the image on a worker thread while the configuration is prepared
+    image_task = None
+    if image is None:
+        image_task = asyncio.create_task(asyncio.to_thread(load_image_opencv, image_path))
     
-    # Update output directory if provided
-    if output_dir:
-        config["output_dir"] = output_dir
+    try:
+        config = load_configuration()
+        if not config:
+            return None
     
-    # Force disable ALL debug output in deploy mode
-    if mode == "deploy_mcp":
-        config.update({
-            "yolo_enable_debug": False,
-            "yolo_enable_timing": False,
-            "ocr_enable_debug": False,
-            "ocr_enable_timing": False,
-            "seraphine_enable_debug": False,
-            "seraphine_timing": False,
-            "save_visualizations": False,
-            "save_json": False,
-            "save_gemini_visualization": False,
-            "save_gemini_json": False,
-        })
+        # Update output directory if provided
+        if output_dir:
+            config["output_dir"] = output_dir
     
-    debug_print("🚀 ENHANCED AI PIPELINE V1.2: Detection + Merging + Seraphine + Gemini + Export")
-    debug_print("=" * 90)
+        # Force disable ALL debug output in deploy mode
+        if mode == "deploy_mcp":
+            config.update({
+                "yolo_enable_debug": False,
+                "yolo_enable_timing": False,
+                "ocr_enable_debug": False,
+                "ocr_enable_timing": False,
+                "seraphine_enable_debug": False,
+                "seraphine_timing": False,
+                "save_visualizations": False,
+                "save_json": False,
+                "save_gemini_visualization": False,
+                "save_gemini_json": False,
+            })
     
-    # Set up detector configs BEFORE using them
-    yolo_config, ocr_config = setup_detector_configs(config)
+        debug_print("🚀 ENHANCED AI PIPELINE V1.2: Detection + Merging + Seraphine + Gemini + Export")
+        debug_print("=" * 90)
+    
+        # Set up detector configs BEFORE using them
+        yolo_config, ocr_config = setup_detector_configs(config)
+    
+        # Load and validate image (unless the caller already has the frame in memory)
+        img_bgr = image if image_task is None else await image_task
+    finally:
+        # Leave no read running if setup failed or we were cancelled before awaiting it
+        if image_task is not None and not image_task.done():
+            image_task.cancel()
+            await asyncio.wait([image_task])
     
-    # Load and validate image
-    img_bgr = load_image_opencv(image_path)
     if img_bgr is None:
         debug_print(f"❌ Error: Could not load image '{image_path}'")
         return None
@@ -95,11 +134,18 @@ async def run_pipeline(image_path, mode="debug", output_dir=None):
     debug_print(f"📸 Image loaded: {img_bgr.shape[1]}x{img_bgr.shape[0]} pixels")
     
     try:
-        # Step 1: Detection + Merging
-        detection_results = run_parallel_detection_and_merge(img_bgr, yolo_config, ocr_config, config)
+        # CPU-bound stages run on worker threads so the event loop (and the agent
+        # loop awaiting this pipeline) keeps running while they execute
+        
+        # Step 1: Detection + Merging (YOLO and OCR already run in parallel inside)
+        detection_results = await asyncio.to_thread(
+            run_parallel_detection_and_merge, img_bgr, yolo_config, ocr_config, config
+        )
         
         # Step 2: Seraphine Grouping
-        seraphine_analysis = run_seraphine_grouping(detection_results['merged_detections'], config)
+        seraphine_analysis = await asyncio.to_thread(
+            run_seraphine_grouping, detection_results['merged_detections'], config
+        )
         
         # Step 3: Generate Grouped Images
         grouped_image_paths = None
@@ -114,7 +160,8 @@ async def run_pipeline(image_path, mode="debug", output_dir=None):
                 save_mapping=False
             )
             
-            grouped_image_paths = final_group_generator.create_grouped_images(
+            grouped_image_paths = await asyncio.to_thread(
+                final_group_generator.create_grouped_images,
                 image_path, 
                 seraphine_analysis, 
                 filename_base
@@ -148,16 +195,13 @@ async def run_pipeline(image_path, mode="debug", output_dir=None):
             print(f"Pipeline completed in {total_time:.3f}s, found {icon_count} icons.")
             
             # Clean up output directory
-            output_dir = config.get("output_dir", "outputs")
-            if os.path.exists(output_dir):
-                import shutil
-                shutil.rmtree(output_dir)
-                os.makedirs(output_dir, exist_ok=True)
+            _discard_output_dir(config.get("output_dir", "outputs"))
             
             field_name = 'seraphine_gemini_groups' if gemini_results else 'seraphine_groups'
             
             # Create a copy of seraphine_analysis without the bbox_processor
-            serializable_analysis = {k: v for k, v in seraphine_analysis.items() if k != 'bbox_processor'}
+            serializable_analysis = seraphine_analysis.copy()
+            serializable_analysis.pop('bbox_processor', None)
             
             return {
                 'total_time': total_time,
@@ -166,17 +210,18 @@ async def run_pipeline(image_path, mode="debug", output_dir=None):
             }
         
         else:  # DEBUG MODE
-            # Step 5: Save JSON
-            json_path = save_enhanced_pipeline_json(image_path, detection_results, seraphine_analysis, gemini_results, config)
-            
-            # Step 6: Create Visualizations
-            visualization_paths = create_visualizations(image_path, detection_results, seraphine_analysis, config, gemini_results)
+            # Step 5 + 6: Save JSON and create visualizations (independent, run concurrently)
+            json_path, visualization_paths = await asyncio.gather(
+                asyncio.to_thread(save_enhanced_pipeline_json, image_path, detection_results, seraphine_analysis, gemini_results, config),
+                asyncio.to_thread(create_visualizations, image_path, detection_results, seraphine_analysis, config, gemini_results)
+            )
             
             # Summary
             display_enhanced_pipeline_summary(image_path, detection_results, seraphine_analysis, gemini_results, visualization_paths, json_path, config)
             
             # Create a copy of seraphine_analysis without the bbox_processor
-            serializable_analysis = {k: v for k, v in seraphine_analysis.items() if k != 'bbox_processor'}
+            serializable_analysis = seraphine_analysis.copy()
+            serializable_analysis.pop('bbox_processor', None)
             
             return {
                 'detection_results': detection_results,
@@ -196,8 +241,7 @@ async def run_pipeline(image_path, mode="debug", output_dir=None):
             print(f"Pipeline failed after {total_time:.3f}s: {str(e)}")
         else:
             debug_print(f"❌ Error during pipeline execution: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            _debug_print_exc()
         
         return None
 
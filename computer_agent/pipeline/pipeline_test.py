@@ -157,7 +157,8 @@ async def run_pipeline_test(image_path, mode="debug", output_dir=None):
             field_name = 'seraphine_gemini_groups' if gemini_results else 'seraphine_groups'
             
             # Create a copy of seraphine_analysis without the bbox_processor
-            serializable_analysis = {k: v for k, v in seraphine_analysis.items() if k != 'bbox_processor'}
+            serializable_analysis = seraphine_analysis.copy()
+            serializable_analysis.pop('bbox_processor', None)
             
             return {
                 'total_time': total_time,
@@ -176,7 +177,8 @@ async def run_pipeline_test(image_path, mode="debug", output_dir=None):
             display_enhanced_pipeline_summary(image_path, detection_results, seraphine_analysis, gemini_results, visualization_paths, json_path, config)
             
             # Create a copy of seraphine_analysis without the bbox_processor
-            serializable_analysis = {k: v for k, v in seraphine_analysis.items() if k != 'bbox_processor'}
+            serializable_analysis = seraphine_analysis.copy()
+            serializable_analysis.pop('bbox_processor', None)
             
             return {
                 'detection_results': detection_results,
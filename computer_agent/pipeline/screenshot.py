@@ -2,10 +2,44 @@
 Simple screenshot functionality that saves to output folder
 """
 import os
+import time
 import cv2
 import numpy as np
 from PIL import ImageGrab
-from datetime import datetime
+
+try:
+    import mss
+    MSS_AVAILABLE = True
+except ImportError:
+    mss = None
+    MSS_AVAILABLE = False
+
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJPF_RGB
+    _JPEG = TurboJPEG()
+    TURBOJPEG_AVAILABLE = True
+except Exception:  # Missing package or libjpeg-turbo library
+    _JPEG = None
+    TURBOJPEG_AVAILABLE = False
+
+# JPEG quality for saved screenshots
+JPEG_QUALITY = 85
+
+def _screenshot_filepath(output_dir, suffix):
+    """Build the timestamped screenshot path, creating the directory if needed"""
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    if suffix == "none":    
+        filename = f"screenshot_{timestamp}.jpg"
+    else:
+        filename = f"screenshot_{timestamp}_{suffix}.jpg"
+    return os.path.join(output_dir, filename)
+
+def _write_turbojpeg(filepath, frame, pixel_format):
+    """Encode a uint8 frame with libjpeg-turbo's SIMD encoder and write it out"""
+    data = _JPEG.encode(frame, quality=JPEG_QUALITY, pixel_format=pixel_format)
+    with open(filepath, "wb") as f:
+        f.write(data)
 
 def take_screenshot(output_dir="outputs", suffix="none"):
     """
@@ -21,23 +55,14 @@ def take_screenshot(output_dir="outputs", suffix="none"):
         # Take screenshot using PIL
         screenshot = ImageGrab.grab()
         
-        # Convert PIL Image to OpenCV format (BGR)
-        screenshot = np.array(screenshot)
-        screenshot = cv2.cvtColor(screenshot, cv2.COLOR_RGB2BGR)
+        # Create output directory if it doesn't exist and generate filename with timestamp
+        filepath = _screenshot_filepath(output_dir, suffix)
         
-        # Create output directory if it doesn't exist
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Generate filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        if suffix == "none":    
-            filename = f"screenshot_{timestamp}.jpg"
+        # Save screenshot straight from the RGB pixels, skipping the BGR conversion
+        if TURBOJPEG_AVAILABLE:
+            _write_turbojpeg(filepath, np.asarray(screenshot), TJPF_RGB)
         else:
-            filename = f"screenshot_{timestamp}_{suffix}.jpg"
-        filepath = os.path.join(output_dir, filename)
-        
-        # Save screenshot
-        cv2.imwrite(filepath, screenshot)
+            screenshot.save(filepath, "JPEG", quality=JPEG_QUALITY)
         print(f"📸 Screenshot saved: {filepath}")
         
         # Return relative path
@@ -46,3 +71,61 @@ def take_screenshot(output_dir="outputs", suffix="none"):
     except Exception as e:
         print(f"❌ Error taking screenshot: {str(e)}")
         return None
+
+def take_screenshot_buffer(out=None):
+    """
+    Capture the primary screen into a BGR frame without going through disk.
+    
+    Args:
+        out (np.ndarray): Optional preallocated (H, W, 3) uint8 buffer to capture into;
+                          reused when its shape still matches the screen
+    
+    Returns:
+        np.ndarray: BGR frame (the `out` buffer when it could be reused), or None on error
+    """
+    try:
+        if MSS_AVAILABLE:
+            # Captures run on worker threads and mss handles are per-thread,
+            # so open one per call and let the context manager release it
+            with mss.mss() as grabber:
+                shot = grabber.grab(grabber.monitors[1])
+            # View over mss's BGRA buffer, no copy
+            src = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+            code = cv2.COLOR_BGRA2BGR
+        else:
+            # View over PIL's RGB pixels, converted in the single pass below
+            src = np.asarray(ImageGrab.grab())
+            code = cv2.COLOR_RGB2BGR
+        
+        if out is None or out.shape != (src.shape[0], src.shape[1], 3):
+            out = np.empty((src.shape[0], src.shape[1], 3), dtype=np.uint8)
+        cv2.cvtColor(src, code, dst=out)
+        return out
+        
+    except Exception as e:
+        print(f"❌ Error taking screenshot: {str(e)}")
+        return None
+
+def save_screenshot(frame, output_dir="outputs", suffix="none"):
+    """
+    Save a captured BGR frame the same way take_screenshot names its files.
+    
+    Args:
+        frame (np.ndarray): BGR frame from take_screenshot_buffer
+        output_dir (str): Directory to save screenshots (default: "outputs")
+    
+    Returns:
+        str: Relative path to the saved screenshot
+    """
+    try:
+        filepath = _screenshot_filepath(output_dir, suffix)
+        if TURBOJPEG_AVAILABLE:
+            _write_turbojpeg(filepath, frame, TJPF_BGR)
+        else:
+            # Single-pass Huffman coding
+            cv2.imwrite(filepath, frame, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY, cv2.IMWRITE_JPEG_OPTIMIZE, 0])
+        print(f"📸 Screenshot saved: {filepath}")
+        return filepath
+    except Exception as e:
+        print(f"❌ Error saving screenshot: {str(e)}")
+        return None
@@ -4,7 +4,7 @@ Test file for the pipeline module
 import os
 import sys
 import asyncio
-from datetime import datetime
+import time
 
 # Add parent directory to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -14,6 +14,22 @@ from pipeline import run_pipeline
 from screenshot import take_screenshot
 from utils.output_manager import get_output_folder
 
+def _existing_files(paths):
+    """Subset of paths that exist, listing each parent directory once instead of a stat per file"""
+    listings = {}
+    existing = set()
+    for path in paths:
+        directory, name = os.path.split(path)
+        if directory not in listings:
+            try:
+                with os.scandir(directory or ".") as entries:
+                    listings[directory] = {entry.name for entry in entries}
+            except FileNotFoundError:
+                listings[directory] = set()
+        if name in listings[directory]:
+            existing.add(path)
+    return existing
+
 async def test_pipeline():
     """Test the pipeline functionality"""
     print("\n🧪 Starting Pipeline Test")
@@ -25,7 +41,7 @@ async def test_pipeline():
     
     try:
         # Create session-specific output folder for image test
-        image_session_id = f"image_test_{datetime.now().strftime('%H%M%S')}"
+        image_session_id = f"image_test_{time.strftime('%H%M%S')}"
         image_output_folder = get_output_folder(image_session_id)
         print(f"📁 Using output folder for image test: {image_output_folder}")
         
@@ -45,12 +61,13 @@ async def test_pipeline():
                 return False
         
         # Check output files
-        if not os.path.exists(results['json_path']):
+        existing = _existing_files([results['json_path'], *results['visualization_paths'].values()])
+        if results['json_path'] not in existing:
             print(f"❌ Test Failed: JSON file not created at {results['json_path']}")
             return False
             
         for name, path in results['visualization_paths'].items():
-            if not os.path.exists(path):
+            if path not in existing:
                 print(f"❌ Test Failed: Visualization file not created: {name} at {path}")
                 return False
         
@@ -58,12 +75,12 @@ async def test_pipeline():
         print("\n📸 Testing with screenshot")
         
         # Create new session-specific output folder for screenshot test
-        screenshot_session_id = f"screenshot_test_{datetime.now().strftime('%H%M%S')}"
+        screenshot_session_id = f"screenshot_test_{time.strftime('%H%M%S')}"
         screenshot_output_folder = get_output_folder(screenshot_session_id)
         print(f"📁 Using output folder for screenshot test: {screenshot_output_folder}")
         
         # Take screenshot in the new output folder
-        screenshot_path = take_screenshot(output_dir=str(screenshot_output_folder))
+        screenshot_path = await asyncio.to_thread(take_screenshot, output_dir=str(screenshot_output_folder))
         if screenshot_path is None:
             print("❌ Test Failed: Could not take screenshot")
             return False
@@ -6,12 +6,88 @@ import logging
 import sys
 from pathlib import Path
 import json
+from collections import deque
 from datetime import datetime
-from typing import Dict, List, Optional, Set
+from functools import partial
+from typing import Callable, Dict, List, Optional, Set
 from aiohttp import web
 from windowManager.window_manager import WindowManager
 from windowManager.window_functions import WindowController
-from windowManager.window_screengrab import take_screenshot
+
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+
+def _json_response(data, status: int = 200) -> web.Response:
+    """JSON response serialized with orjson when it is installed"""
+    return web.Response(body=_dumps(data), status=status, content_type='application/json')
+
+
+# Window IDs are addressable by their last SHORT_ID_LEN characters
+SHORT_ID_LEN = 8
+
+# Events an SSE client may fall behind by before it is dropped
+CLIENT_QUEUE_SIZE = 64
+
+# SSE framing for the events this server sends, so an event is a single concatenation
+_EVENT_PREFIX = {event_type: f"event: {event_type}\ndata: ".encode() for event_type in ('init', 'command_result')}
+
+
+def _encode_event(event_type: str, data) -> bytes:
+    """Encode an SSE event as the bytes written to the stream"""
+    prefix = _EVENT_PREFIX.get(event_type) or f"event: {event_type}\ndata: ".encode()
+    return prefix + _dumps(data) + b"\n\n"
+
+
+def _unique_suffixes(window_ids: Set[str]) -> Dict[str, str]:
+    """Map the shortest suffix that tells each of the windows apart to its full ID"""
+    suffixes = {}
+    for window_id in window_ids:
+        suffix = window_id  # IDs no longer than SHORT_ID_LEN skip the loop below
+        for length in range(SHORT_ID_LEN + 1, len(window_id) + 1):
+            suffix = window_id[-length:]
+            if not any(other != window_id and other.endswith(suffix) for other in window_ids):
+                break
+        suffixes[suffix] = window_id
+    return suffixes
+
+
+def _result(success: bool, message) -> Dict:
+    """Command result for a WindowManager (success, message) pair"""
+    return {'success': success, 'message': message}
+
+
+def _windows_summary_lines(data: Dict):
+    """Yield the lines of the window summary for get_structured_windows() data"""
+    totals = data['summary']
+    # Add timestamp
+    yield f"Window Summary at {time.strftime('%Y-%m-%d %H:%M:%S')}"
+    yield f"Total Monitors: {totals['total_monitors']}"
+    yield f"Total Windows: {totals['total_windows']}"
+    yield f"Total Applications: {totals['total_apps']}"
+    yield ""
+
+    # Add monitor details
+    for monitor_id, monitor_data in data["monitors"].items():
+        yield f"=== {monitor_id.upper()} ==="
+        yield f"Device: {monitor_data['device']}"
+        yield f"Resolution: {monitor_data['width']}x{monitor_data['height']}"
+        yield f"Primary: {'Yes' if monitor_data['primary'] else 'No'}"
+        yield f"Windows: {monitor_data['window_count']}"
+        yield ""
+
+        # Add application details
+        for app_name, app_data in monitor_data["applications"].items():
+            yield f"  {app_name} ({app_data['window_count']} windows)"
+            for window in app_data["windows"].values():
+                yield f"    - {window['title']} ({'MINIMIZED' if window['minimized'] else 'VISIBLE'})"
+            yield ""
 
 def setup_logging(module_name: str):
     """
@@ -43,26 +119,122 @@ def setup_logging(module_name: str):
 logger = setup_logging("MCPServer")
 
 class MCPServer:
+    # Available tools and their parameters, grouped by category
+    _TOOLS: Dict[str, Dict] = {
+        'window_commands': {
+            'maximize': {'description': 'Maximize window', 'params': {'window_id': 'string'}},
+            'minimize': {'description': 'Minimize window', 'params': {'window_id': 'string'}},
+            'close': {'description': 'Close window', 'params': {'window_id': 'string'}},
+            'resize': {'description': 'Resize window', 'params': {'window_id': 'string', 'width': 'number', 'height': 'number'}},
+            'move': {'description': 'Move window', 'params': {'window_id': 'string', 'x': 'number', 'y': 'number'}},
+            'screen': {'description': 'Move to screen position', 'params': {'window_id': 'string', 'screen': 'number', 'x': 'number', 'y': 'number'}},
+            'monitor': {'description': 'Move to monitor', 'params': {'window_id': 'string', 'monitor': 'number'}},
+            'introspect': {'description': 'Deep window introspection', 'params': {'window_id': 'string'}},
+            'tree': {'description': 'Show UI hierarchy tree', 'params': {'window_id': 'string'}},
+            'get_windows': {'description': 'Get all windows', 'params': {'show_minimized': 'boolean'}},
+            'print_windows_summary': {'description': 'Print summary of all windows', 'params': {}},
+            'refresh_windows': {'description': 'Refresh window list', 'params': {}}
+        },
+        'mouse_commands': {
+            'click': {'description': 'Mouse click', 'params': {'button': 'string', 'x': 'number', 'y': 'number'}},
+            'doubleclick': {'description': 'Double click', 'params': {'button': 'string', 'x': 'number', 'y': 'number'}},
+            'longclick': {'description': 'Long click', 'params': {'button': 'string', 'duration': 'number', 'x': 'number', 'y': 'number'}},
+            'scroll': {'description': 'Scroll', 'params': {'direction': 'string', 'amount': 'number', 'x': 'number', 'y': 'number'}},
+            'drag': {'description': 'Drag', 'params': {'start_x': 'number', 'start_y': 'number', 'end_x': 'number', 'end_y': 'number', 'button': 'string', 'duration': 'number'}}
+        },
+        'keyboard_commands': {
+            'send': {'description': 'Send key combination', 'params': {'keys': 'string'}},
+            'type': {'description': 'Type text', 'params': {'text': 'string'}}
+        },
+        'system_commands': {
+            'launch': {'description': 'Launch application', 'params': {'app_name': 'string', 'screen_id': 'number', 'fullscreen': 'boolean'}},
+            'msgbox': {'description': 'Show message box', 'params': {'title': 'string', 'message': 'string', 'x': 'number', 'y': 'number'}},
+            'computer': {'description': 'Get computer name', 'params': {}},
+            'user': {'description': 'Get user name', 'params': {}},
+            'keys': {'description': 'Show virtual key codes', 'params': {}},
+            'hover': {'description': 'Analyze element under mouse cursor', 'params': {}},
+            'inspect': {'description': 'Full window analysis (same as i)', 'params': {}},
+            'detect': {'description': 'Real-time cursor element detection', 'params': {}},
+            'cursor': {'description': 'Get or set cursor position', 'params': {'x': 'number (optional)', 'y': 'number (optional)'}},
+        }
+    }
+
     def __init__(self):
         logger.info("Initializing MCPServer")
         self.wm = WindowManager()
         self.wc = WindowController()
-        self.clients: Set[web.StreamResponse] = set()
-        self.command_history = []
+        self.clients: Dict[web.StreamResponse, asyncio.Queue] = {}  # SSE client -> its pending events
         self.max_history = 100
-        self._running = True
+        self.command_history = deque(maxlen=self.max_history)  # oldest entries fall off on append
+        self._stop = asyncio.Event()  # set by shutdown(), awaited by main()
         self.window_short_id_lookup = {}  # NEW: short_id -> full_id
-
-    def refresh_window_short_id_lookup(self):
-        """Refresh the short ID lookup table from current windows."""
+        self._full_ids: Set[str] = set()  # full IDs of the windows seen by the last refresh
+        self._short_id_owners: Dict[str, Set[str]] = {}  # short_id -> full IDs ending with it
+        self._short_id_keys: Dict[str, List[str]] = {}  # short_id -> its keys in window_short_id_lookup
+        self._lookup_ts = 0.0  # monotonic time of the last lookup refresh, 0 forces a refresh
+        self._lookup_ttl = 0.5  # seconds a lookup stays fresh across a burst of commands
+        # The catalog never changes, so /tools serves the same serialized body
+        self._tools_body = _dumps(self._TOOLS)
+        # command -> handler, so dispatch is a single lookup
+        self._dispatch = self._build_dispatch()
+
+    def _iter_window_ids(self):
+        """Yield the full ID of every current window."""
         data = self.wm.get_structured_windows()
-        lookup = {}
         for monitor_data in data["monitors"].values():
             for app_data in monitor_data["applications"].values():
-                for window_id, window_data in app_data["windows"].items():
-                    last_8 = window_id[-8:]
-                    lookup[last_8] = window_id
-        self.window_short_id_lookup = lookup
+                yield from app_data["windows"]
+
+    def refresh_window_short_id_lookup(self):
+        """Refresh the short ID lookup table from current windows."""
+        current_ids = set(self._iter_window_ids())
+        owners = self._short_id_owners
+        # Only touch the short IDs of windows that closed or appeared since the last refresh
+        changed = set()
+        for window_id in self._full_ids - current_ids:
+            short_id = window_id[-SHORT_ID_LEN:]
+            owners[short_id].discard(window_id)
+            changed.add(short_id)
+        for window_id in current_ids - self._full_ids:
+            short_id = window_id[-SHORT_ID_LEN:]
+            owners.setdefault(short_id, set()).add(window_id)
+            changed.add(short_id)
+        for short_id in changed:
+            self._index_short_id(short_id)
+        self._full_ids = current_ids
+        self._lookup_ts = time.monotonic()
+
+    def _index_short_id(self, short_id: str):
+        """Rebuild the lookup entries of the windows sharing one short ID."""
+        lookup = self.window_short_id_lookup
+        for key in self._short_id_keys.pop(short_id, ()):
+            lookup.pop(key, None)
+        window_ids = self._short_id_owners.get(short_id)
+        if not window_ids:
+            self._short_id_owners.pop(short_id, None)
+            return
+        if len(window_ids) == 1:
+            keys = {short_id: next(iter(window_ids))}
+        else:
+            # Colliding windows are addressed by longer suffixes instead of one silently winning
+            keys = _unique_suffixes(window_ids)
+        lookup.update(keys)
+        self._short_id_keys[short_id] = list(keys)
+
+    def _ensure_window_short_id_lookup(self):
+        """Refresh the short ID lookup table only once it is older than the TTL."""
+        if time.monotonic() - self._lookup_ts > self._lookup_ttl:
+            self.refresh_window_short_id_lookup()
+
+    def _resolve_window_id(self, window_id: str) -> Optional[str]:
+        """Return the full ID for a full or short window ID, or None if unknown."""
+        if window_id in self._full_ids:
+            return window_id
+        return self.window_short_id_lookup.get(window_id)
+
+    def _invalidate_window_short_id_lookup(self):
+        """Force the next command to rebuild the short ID lookup table."""
+        self._lookup_ts = 0.0
 
     async def handle_sse(self, request):
         logger.info("SSE client connected")
@@ -77,34 +249,29 @@ class MCPServer:
             }
         )
         
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
         try:
             await response.prepare(request)
-            self.clients.add(response)
+            self.clients[response] = queue
             
             # Send initial state
-            try:
-                await self._send_event(response, 'init', {
-                    'status': 'connected',
-                    'tools': self._get_available_tools()
-                })
-            except Exception as e:
-                print(f"Error sending initial state: {e}")
-                self.clients.discard(response)
-                return response
-
-            # Keep connection alive
-            while self._running:
-                try:
-                    await asyncio.sleep(1)
-                except Exception as e:
-                    print(f"SSE connection error: {e}")
+            queue.put_nowait(_encode_event('init', {
+                'status': 'connected',
+                'tools': self._get_available_tools()
+            }))
+
+            # Write this client's events until it is dropped or the server shuts down
+            while True:
+                payload = await queue.get()
+                if payload is None:
                     break
+                await response.write(payload)
 
         except Exception as e:
-            print(f"SSE setup error: {e}")
+            print(f"SSE connection error: {e}")
         finally:
             # Remove client from set
-            self.clients.discard(response)
+            self.clients.pop(response, None)
             try:
                 await response.write_eof()
             except Exception as e:
@@ -121,7 +288,7 @@ class MCPServer:
 
             if not command:
                 logger.warning("No command provided in request")
-                return web.json_response({'error': 'No command provided'}, status=400)
+                return _json_response({'error': 'No command provided'}, status=400)
             
             # Execute command
             result = await self._execute_command(command, params)
@@ -133,8 +300,6 @@ class MCPServer:
                 'params': params,
                 'result': result
             })
-            if len(self.command_history) > self.max_history:
-                self.command_history.pop(0)
             
             # Broadcast result to all clients
             await self._broadcast_event('command_result', {
@@ -143,321 +308,209 @@ class MCPServer:
                 'result': result
             })
             
-            return web.json_response(result)
+            return _json_response(result)
         except Exception as e:
             logger.exception("Exception in handle_command")
-            return web.json_response({'error': str(e)}, status=500)
+            return _json_response({'error': str(e)}, status=500)
 
     async def handle_tools(self, request):
         """Return available tools"""
-        return web.json_response(self._get_available_tools())
+        return web.Response(body=self._tools_body, content_type='application/json')
 
     async def handle_history(self, request):
         """Return command history"""
-        return web.json_response(self.command_history)
+        return _json_response(list(self.command_history))
 
     def _get_available_tools(self) -> Dict:
         """Get list of available tools and their parameters"""
-        return {
-            'window_commands': {
-                'maximize': {'description': 'Maximize window', 'params': {'window_id': 'string'}},
-                'minimize': {'description': 'Minimize window', 'params': {'window_id': 'string'}},
-                'close': {'description': 'Close window', 'params': {'window_id': 'string'}},
-                'resize': {'description': 'Resize window', 'params': {'window_id': 'string', 'width': 'number', 'height': 'number'}},
-                'move': {'description': 'Move window', 'params': {'window_id': 'string', 'x': 'number', 'y': 'number'}},
-                'screen': {'description': 'Move to screen position', 'params': {'window_id': 'string', 'screen': 'number', 'x': 'number', 'y': 'number'}},
-                'monitor': {'description': 'Move to monitor', 'params': {'window_id': 'string', 'monitor': 'number'}},
-                'introspect': {'description': 'Deep window introspection', 'params': {'window_id': 'string'}},
-                'tree': {'description': 'Show UI hierarchy tree', 'params': {'window_id': 'string'}},
-                'get_windows': {'description': 'Get all windows', 'params': {'show_minimized': 'boolean'}},
-                'print_windows_summary': {'description': 'Print summary of all windows', 'params': {}},
-                'refresh_windows': {'description': 'Refresh window list', 'params': {}}
-            },
-            'mouse_commands': {
-                'click': {'description': 'Mouse click', 'params': {'button': 'string', 'x': 'number', 'y': 'number'}},
-                'doubleclick': {'description': 'Double click', 'params': {'button': 'string', 'x': 'number', 'y': 'number'}},
-                'longclick': {'description': 'Long click', 'params': {'button': 'string', 'duration': 'number', 'x': 'number', 'y': 'number'}},
-                'scroll': {'description': 'Scroll', 'params': {'direction': 'string', 'amount': 'number', 'x': 'number', 'y': 'number'}},
-                'drag': {'description': 'Drag', 'params': {'start_x': 'number', 'start_y': 'number', 'end_x': 'number', 'end_y': 'number', 'button': 'string', 'duration': 'number'}}
-            },
-            'keyboard_commands': {
-                'send': {'description': 'Send key combination', 'params': {'keys': 'string'}},
-                'type': {'description': 'Type text', 'params': {'text': 'string'}}
-            },
-            'system_commands': {
-                'launch': {'description': 'Launch application', 'params': {'app_name': 'string', 'screen_id': 'number', 'fullscreen': 'boolean'}},
-                'msgbox': {'description': 'Show message box', 'params': {'title': 'string', 'message': 'string', 'x': 'number', 'y': 'number'}},
-                'computer': {'description': 'Get computer name', 'params': {}},
-                'user': {'description': 'Get user name', 'params': {}},
-                'keys': {'description': 'Show virtual key codes', 'params': {}},
-                'hover': {'description': 'Analyze element under mouse cursor', 'params': {}},
-                'inspect': {'description': 'Full window analysis (same as i)', 'params': {}},
-                'detect': {'description': 'Real-time cursor element detection', 'params': {}},
-                'cursor': {'description': 'Get or set cursor position', 'params': {'x': 'number (optional)', 'y': 'number (optional)'}},
-            }
-        }
+        return self._TOOLS
 
     async def _execute_command(self, command: str, params: Dict) -> Dict:
         logger.info(f"Executing _execute_command: {command} {params}")
+        handler = self._dispatch.get(command)
+        if handler is None:
+            return {'error': f'Unknown command: {command}'}
         try:
-            # Parse command and parameters
-            if command in self._get_available_tools()['window_commands']:
-                return await self._execute_window_command(command, params)
-            elif command in self._get_available_tools()['mouse_commands']:
-                return await self._execute_mouse_command(command, params)
-            elif command in self._get_available_tools()['keyboard_commands']:
-                return await self._execute_keyboard_command(command, params)
-            elif command in self._get_available_tools()['system_commands']:
-                return await self._execute_system_command(command, params)
-            else:
-                return {'error': f'Unknown command: {command}'}
+            return handler(params)
         except Exception as e:
             return {'error': str(e)}
 
-    async def _execute_window_command(self, command: str, params: Dict) -> Dict:
-        """Execute window-related command, supporting short window IDs."""
-        logger.info(f"Executing _execute_window_command: {command} {params}")
-        try:
-            self.refresh_window_short_id_lookup()  # Always refresh before command
-
-            if command == 'get_windows':
-                # Use get_all_windows instead of get_windows
-                windows = self.wm.get_all_windows()
-                return {
-                    'success': True,
-                    'result': {  # Changed to match expected format
-                        'windows': windows
-                    },
-                    'message': f'Found {len(windows)} windows'
-                }
-            elif command == 'print_windows_summary':
-                data = self.wm.get_structured_windows()
-                summary = []
-                
-                # Add timestamp
-                summary.append(f"Window Summary at {time.strftime('%Y-%m-%d %H:%M:%S')}")
-                summary.append(f"Total Monitors: {data['summary']['total_monitors']}")
-                summary.append(f"Total Windows: {data['summary']['total_windows']}")
-                summary.append(f"Total Applications: {data['summary']['total_apps']}")
-                summary.append("")
-                
-                # Add monitor details
-                for monitor_id, monitor_data in data["monitors"].items():
-                    summary.append(f"=== {monitor_id.upper()} ===")
-                    summary.append(f"Device: {monitor_data['device']}")
-                    summary.append(f"Resolution: {monitor_data['width']}x{monitor_data['height']}")
-                    summary.append(f"Primary: {'Yes' if monitor_data['primary'] else 'No'}")
-                    summary.append(f"Windows: {monitor_data['window_count']}")
-                    summary.append("")
-                    
-                    # Add application details
-                    for app_name, app_data in monitor_data["applications"].items():
-                        summary.append(f"  {app_name} ({app_data['window_count']} windows)")
-                        for window_id, window in app_data["windows"].items():
-                            state = "MINIMIZED" if window["minimized"] else "VISIBLE"
-                            summary.append(f"    - {window['title']} ({state})")
-                        summary.append("")
-                
-                return {'success': True, 'message': '\n'.join(summary)}
-            elif command == 'refresh_windows':
-                # Refresh the window list
-                data = self.wm.get_structured_windows()
-                # Update short ID lookup
-                self.refresh_window_short_id_lookup()
-                return {'success': True, 'message': f"Refreshed {data['summary']['total_windows']} windows"}
-            else:
-                window_id = params.get('window_id')
-                if not window_id:
-                    return {'error': 'Window ID required'}
-
-                # NEW: Support short window ID
-                if window_id not in self.window_short_id_lookup.values():
-                    # If not a full ID, try to resolve as short ID
-                    if window_id in self.window_short_id_lookup:
-                        window_id = self.window_short_id_lookup[window_id]
-                    else:
-                        return {'error': f"Window ID '{window_id}' not found (full or short ID)"}
-
-                # Extract HWND from composite window_id
-                hwnd = int(window_id.split('_')[0])
-
-                logger.info(f"Executing _execute_window_command: {command} {params} {window_id}")
-                if command == 'maximize':
-                    success, message = self.wm.maximize_window(hwnd)
-                    logger.info(f"Executing _execute_window_command: {command} {params} {window_id} {success} {message}")
-                elif command == 'minimize':
-                    success, message = self.wm.minimize_window(hwnd)
-                elif command == 'close':
-                    success, message = self.wm.close_window(hwnd)
-                elif command == 'resize':
-                    success, message = self.wm.resize_window(hwnd, params['width'], params['height'])
-                elif command == 'move':
-                    success, message = self.wm.move_window(hwnd, params['x'], params['y'])
-                elif command == 'screen':
-                    success, message = self.wm.move_window_to_screen_position(hwnd, params['screen'], params['x'], params['y'])
-                elif command == 'monitor':
-                    success, message = self.wm.move_window_to_monitor(hwnd, params['monitor'])
-                elif command == 'introspect':
-                    success, message = self.wm.introspect_window(hwnd)
-                elif command == 'tree':
-                    success, message = self.wm.get_window_hierarchy_tree(hwnd)
-                else:
-                    return {'error': f'Unknown window command: {command}'}
-
-            return {'success': success, 'message': message}
-        except Exception as e:
-            return {'error': str(e)}
+    def _build_dispatch(self) -> Dict[str, Callable[[Dict], Dict]]:
+        """Map every command in _TOOLS to the handler that executes it"""
+        wm = self.wm
+        # Window commands addressed by a full or short window ID
+        window_actions = {
+            'maximize': lambda hwnd, params: wm.maximize_window(hwnd),
+            'minimize': lambda hwnd, params: wm.minimize_window(hwnd),
+            'close': lambda hwnd, params: wm.close_window(hwnd),
+            'resize': lambda hwnd, params: wm.resize_window(hwnd, params['width'], params['height']),
+            'move': lambda hwnd, params: wm.move_window(hwnd, params['x'], params['y']),
+            'screen': lambda hwnd, params: wm.move_window_to_screen_position(hwnd, params['screen'], params['x'], params['y']),
+            'monitor': lambda hwnd, params: wm.move_window_to_monitor(hwnd, params['monitor']),
+            'introspect': lambda hwnd, params: wm.introspect_window(hwnd),
+            'tree': lambda hwnd, params: wm.get_window_hierarchy_tree(hwnd),
+        }
+        return {
+            **{command: partial(self._do_window_action, command, action) for command, action in window_actions.items()},
+            'get_windows': self._do_get_windows,
+            'print_windows_summary': self._do_print_windows_summary,
+            'refresh_windows': self._do_refresh_windows,
+            'click': self._do_click,
+            'doubleclick': lambda params: _result(*wm.send_mouse_double_click(params.get('button', 'left'), params.get('x'), params.get('y'))),
+            'longclick': lambda params: _result(*wm.send_mouse_long_click(params.get('button', 'left'), params.get('duration', 1.0), params.get('x'), params.get('y'))),
+            'scroll': self._do_scroll,
+            'drag': lambda params: _result(*wm.send_mouse_drag(params['start_x'], params['start_y'], params['end_x'], params['end_y'], params.get('button', 'left'), params.get('duration', 0.5))),
+            'send': lambda params: _result(*wm.send_key_combination(params['keys'])),
+            'type': lambda params: _result(*wm.send_text(params['text'])),
+            'launch': self._do_launch,
+            'msgbox': self._do_msgbox,
+            'computer': lambda params: _result(*wm.get_computer_name()),
+            'user': lambda params: _result(*wm.get_user_name()),
+            'keys': lambda params: _result(*wm.get_virtual_key_codes()),
+            'hover': partial(self._do_element_under_cursor, "Element under cursor"),
+            'detect': partial(self._do_element_under_cursor, "Element under cursor"),
+            'inspect': partial(self._do_element_under_cursor, "Full window analysis"),
+            'cursor': self._do_cursor,
+        }
 
-    async def _execute_mouse_command(self, command: str, params: Dict) -> Dict:
-        """Execute mouse-related command"""
-        logger.info(f"Executing _execute_mouse_command: {command} {params}")
-        if command == 'click':
-            button = params.get('button', 'left')
-            x = int(params.get('x')) if params.get('x') is not None else None
-            y = int(params.get('y')) if params.get('y') is not None else None
-            success, message = self.wm.send_mouse_click(button, x, y)
-        elif command == 'doubleclick':
-            success, message = self.wm.send_mouse_double_click(params.get('button', 'left'), params.get('x'), params.get('y'))
-        elif command == 'longclick':
-            success, message = self.wm.send_mouse_long_click(params.get('button', 'left'), params.get('duration', 1.0), params.get('x'), params.get('y'))
-        elif command == 'scroll':
-            direction = params.get('direction', 'up')
-            amount = int(params.get('amount', 3))
-            x = int(params.get('x')) if params.get('x') is not None else None
-            y = int(params.get('y')) if params.get('y') is not None else None
-            success, message = self.wm.send_mouse_scroll(direction, amount, x, y)
-        elif command == 'drag':
-            success, message = self.wm.send_mouse_drag(params['start_x'], params['start_y'], params['end_x'], params['end_y'], params.get('button', 'left'), params.get('duration', 0.5))
-        else:
-            return {'error': f'Unknown mouse command: {command}'}
+    def _do_window_action(self, command: str, action: Callable, params: Dict) -> Dict:
+        """Execute window-related command, supporting short window IDs."""
+        logger.info(f"Executing _do_window_action: {command} {params}")
+        self._ensure_window_short_id_lookup()  # Refresh before command unless recently refreshed
+
+        window_id = params.get('window_id')
+        if not window_id:
+            return {'error': 'Window ID required'}
+
+        # NEW: Support short window ID
+        resolved = self._resolve_window_id(window_id)
+        if resolved is None:
+            # The cached table may predate the window, rescan before giving up
+            self.refresh_window_short_id_lookup()
+            resolved = self._resolve_window_id(window_id)
+        if resolved is None:
+            if len(self._short_id_owners.get(window_id, ())) > 1:
+                candidates = ', '.join(self._short_id_keys[window_id])
+                return {'error': f"Short window ID '{window_id}' matches several windows, use one of: {candidates}"}
+            return {'error': f"Window ID '{window_id}' not found (full or short ID)"}
+        window_id = resolved
+
+        # Extract HWND from composite window_id
+        hwnd = int(window_id.split('_')[0])
+
+        logger.info(f"Executing _do_window_action: {command} {params} {window_id}")
+        success, message = action(hwnd, params)
+
+        if command in ('maximize', 'minimize', 'close', 'screen', 'monitor'):
+            # The window set or the titles may have changed
+            self._invalidate_window_short_id_lookup()
 
         return {'success': success, 'message': message}
 
-    async def _execute_keyboard_command(self, command: str, params: Dict) -> Dict:
-        """Execute keyboard-related command"""
-        logger.info(f"Executing _execute_keyboard_command: {command} {params}")
-        if command == 'send':
-            success, message = self.wm.send_key_combination(params['keys'])
-        elif command == 'type':
-            success, message = self.wm.send_text(params['text'])
-        else:
-            return {'error': f'Unknown keyboard command: {command}'}
+    def _do_get_windows(self, params: Dict) -> Dict:
+        # Use get_all_windows instead of get_windows
+        windows = self.wm.get_all_windows()
+        return {
+            'success': True,
+            'result': {  # Changed to match expected format
+                'windows': windows
+            },
+            'message': f'Found {len(windows)} windows'
+        }
+
+    def _do_print_windows_summary(self, params: Dict) -> Dict:
+        data = self.wm.get_structured_windows()
+        return {'success': True, 'message': '\n'.join(_windows_summary_lines(data))}
 
+    def _do_refresh_windows(self, params: Dict) -> Dict:
+        # Refresh the window list
+        data = self.wm.get_structured_windows()
+        # Update short ID lookup
+        self.refresh_window_short_id_lookup()
+        return {'success': True, 'message': f"Refreshed {data['summary']['total_windows']} windows"}
+
+    def _do_click(self, params: Dict) -> Dict:
+        button = params.get('button', 'left')
+        x = int(params.get('x')) if params.get('x') is not None else None
+        y = int(params.get('y')) if params.get('y') is not None else None
+        return _result(*self.wm.send_mouse_click(button, x, y))
+
+    def _do_scroll(self, params: Dict) -> Dict:
+        direction = params.get('direction', 'up')
+        amount = int(params.get('amount', 3))
+        x = int(params.get('x')) if params.get('x') is not None else None
+        y = int(params.get('y')) if params.get('y') is not None else None
+        return _result(*self.wm.send_mouse_scroll(direction, amount, x, y))
+
+    def _do_launch(self, params: Dict) -> Dict:
+        # Convert types robustly
+        app_name = params.get('app_name')
+        screen_id = int(params.get('screen_id', 1))
+        fullscreen = params.get('fullscreen', False)
+        if isinstance(fullscreen, str):
+            fullscreen = fullscreen.lower() in ('true', '1', 'yes')
+        success, message = self.wm.launch_application(app_name, screen_id, fullscreen)
+        self._invalidate_window_short_id_lookup()
         return {'success': success, 'message': message}
 
-    async def _execute_system_command(self, command: str, params: Dict) -> Dict:
-        """Execute system-related command"""
-        logger.info(f"Executing _execute_system_command: {command} {params}")
+    def _do_msgbox(self, params: Dict) -> Dict:
+        title = params.get('title', '')
+        message = params.get('message', '')
+        x = params.get('x')
+        y = params.get('y')
+        x = int(x) if x is not None else None
+        y = int(y) if y is not None else None
+        return _result(*self.wm.show_message_box(title, message, x, y))
+
+    def _do_element_under_cursor(self, label: str, params: Dict) -> Dict:
         try:
-            if command == 'launch':
-                # Convert types robustly
-                app_name = params.get('app_name')
-                screen_id = int(params.get('screen_id', 1))
-                fullscreen = params.get('fullscreen', False)
-                if isinstance(fullscreen, str):
-                    fullscreen = fullscreen.lower() in ('true', '1', 'yes')
-                success, message = self.wm.launch_application(app_name, screen_id, fullscreen)
-            elif command == 'msgbox':
-                title = params.get('title', '')
-                message_ = params.get('message', '')
-                x = params.get('x')
-                y = params.get('y')
-                x = int(x) if x is not None else None
-                y = int(y) if y is not None else None
-                success, message = self.wm.show_message_box(title, message_, x, y)
-            elif command == 'computer':
-                success, message = self.wm.get_computer_name()
-            elif command == 'user':
-                success, message = self.wm.get_user_name()
-            elif command == 'keys':
-                success, message = self.wm.get_virtual_key_codes()
-            elif command == 'screenshot':
-                try:
-                    path = take_screenshot()
-                    return {'success': True, 'message': f"Screenshot saved: {path}", 'filepath': path}
-                except Exception as e:
-                    return {'success': False, 'message': str(e)}
-            elif command == 'hover' or command == 'detect':
-                try:
-                    result = self.wm.get_element_under_cursor()
-                    return {'success': True, 'message': f"Element under cursor: {result}", 'result': result}
-                except Exception as e:
-                    return {'success': False, 'message': str(e)}
-            elif command == 'inspect':
-                try:
-                    result = self.wm.get_element_under_cursor()
-                    return {'success': True, 'message': f"Full window analysis: {result}", 'result': result}
-                except Exception as e:
-                    return {'success': False, 'message': str(e)}
-            elif command == 'cursor':
-                x = params.get('x')
-                y = params.get('y')
-                if x is not None and y is not None:
-                    try:
-                        x = int(x)
-                        y = int(y)
-                        success, message = self.wm.set_cursor_position(x, y)
-                        return {'success': success, 'message': message}
-                    except Exception as e:
-                        return {'success': False, 'message': str(e)}
-                else:
-                    try:
-                        success, message, pos = self.wm.get_cursor_position()
-                        if success:
-                            return {'success': True, 'message': f"Cursor position: {pos}", 'position': pos}
-                        else:
-                            return {'success': False, 'message': message}
-                    except Exception as e:
-                        return {'success': False, 'message': str(e)}
-            else:
-                return {'error': f'Unknown system command: {command}'}
-
-            return {'success': success, 'message': message}
+            result = self.wm.get_element_under_cursor()
+            return {'success': True, 'message': f"{label}: {result}", 'result': result}
         except Exception as e:
-            return {'error': str(e)}
+            return {'success': False, 'message': str(e)}
 
-    async def _send_event(self, response: web.StreamResponse, event_type: str, data: Dict):
-        """Send SSE event to a client"""
+    def _do_cursor(self, params: Dict) -> Dict:
+        x = params.get('x')
+        y = params.get('y')
         try:
-            await response.write(f"event: {event_type}\n".encode())
-            await response.write(f"data: {json.dumps(data)}\n\n".encode())
+            if x is not None and y is not None:
+                return _result(*self.wm.set_cursor_position(int(x), int(y)))
+            success, message, pos = self.wm.get_cursor_position()
+            if success:
+                return {'success': True, 'message': f"Cursor position: {pos}", 'position': pos}
+            return {'success': False, 'message': message}
         except Exception as e:
-            print(f"Error sending event: {e}")
-            self.clients.discard(response)
+            return {'success': False, 'message': str(e)}
 
     async def _broadcast_event(self, event_type: str, data: Dict):
         """Broadcast SSE event to all clients"""
-        # Create a copy of the clients set to avoid modification during iteration
-        clients_to_process = self.clients.copy()
-        disconnected_clients = set()
-        
-        for client in clients_to_process:
-            try:
-                await self._send_event(client, event_type, data)
-            except Exception as e:
-                print(f"Error broadcasting to client: {e}")
-                disconnected_clients.add(client)
-        
-        # Clean up disconnected clients
-        for client in disconnected_clients:
-            self.clients.discard(client)
+        # Serialize once and queue the same bytes for every client
+        payload = _encode_event(event_type, data)
+
+        # Each client's handle_sse writes its own queue, so a slow client never delays the rest
+        for client, queue in list(self.clients.items()):
             try:
-                await client.write_eof()
-            except Exception as e:
-                print(f"Error closing disconnected client: {e}")
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                print("Dropping SSE client that is not keeping up")
+                self._drop_client(client)
+
+    def _drop_client(self, client: web.StreamResponse):
+        """Stop sending events to a client; its handle_sse then closes the stream"""
+        queue = self.clients.pop(client, None)
+        if queue is None:
+            return
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
 
     async def shutdown(self):
         """Gracefully shutdown the server"""
-        self._running = False
-        
-        # Close all client connections
-        for client in self.clients:
-            try:
-                await client.write_eof()
-            except Exception as e:
-                print(f"Error closing client connection: {e}")
+        self._stop.set()
         
-        self.clients.clear()
+        # Close all client connections; each handle_sse ends its stream
+        for client in list(self.clients):
+            self._drop_client(client)
 
     async def print_server_commands(self):
         """Fetch and print the available commands from the server."""
@@ -499,9 +552,8 @@ async def main():
     print("MCP Server running at http://localhost:8080")
     
     try:
-        # Keep server running
-        while server._running:
-            await asyncio.sleep(1)
+        # Keep server running until shutdown
+        await server._stop.wait()
     except KeyboardInterrupt:
         print("\nShutting down server...")
     finally:
@@ -1,5 +1,6 @@
 import asyncio
 import os
+import sys
 from dotenv import load_dotenv
 from agent.computer_agent import ComputerAgent
 from config.log_config import setup_logging
@@ -87,5 +88,15 @@ async def interactive():
         # Ensure agent is properly shut down
         await agent.mcp.shutdown()
 
+def install_event_loop_policy():
+    """Use uvloop when installed; on Windows (no uvloop) use the selector loop"""
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        if sys.platform == "win32":
+            asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
 if __name__ == "__main__":
+    install_event_loop_policy()
     asyncio.run(interactive())
@@ -4,7 +4,7 @@ Test OCR detection and Gemini analysis functionality
 import os
 import asyncio
 import json
-from datetime import datetime
+import time
 from PIL import Image
 from utils.output_manager import get_output_folder
 from pipeline.screenshot import take_screenshot
@@ -18,7 +18,7 @@ async def run_pipeline():
     print("=" * 50)
     
     # Generate session ID with timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
     session_id = f"pipeline_test_{timestamp}"
     
     # Create session-specific output folder
@@ -27,7 +27,7 @@ async def run_pipeline():
     
     # Take screenshot
     print("📸 Taking screenshot...")
-    screenshot_path = take_screenshot(output_dir=str(output_folder))
+    screenshot_path = await asyncio.to_thread(take_screenshot, output_dir=str(output_folder))
     if screenshot_path is None:
         print("❌ Failed to take screenshot")
         return False
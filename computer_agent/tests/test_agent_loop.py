@@ -0,0 +1,235 @@
+import sys
+import os
+import json
+import asyncio
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+# Add parent directory to path so we can import agent
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from agent.core.context import ComputerAgentContext, StepType
+from agent.core import loop as loop_module
+from agent.core.loop import ComputerAgentLoop
+from agent.core.perception import PERCEPTION_KEYS
+from agent.core.decision import DECISION_KEYS
+from agent.mcp.simple_mcp import TOOL_META, DEFAULT_TOOL_META
+
+
+class FakeMCP:
+    """MultiMCP stand-in that replays scripted tool results"""
+    version = 0
+    server_config = {"id": "windows"}
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = []
+
+    def get_tool_meta(self, tool_name):
+        return TOOL_META.get(tool_name, DEFAULT_TOOL_META)
+
+    async def execute_tool(self, tool_name, params):
+        self.calls.append((tool_name, params))
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def ensure_connected(self):
+        pass
+
+    async def ping(self):
+        return True
+
+    async def list_tools(self):
+        return {"basic": {"click": {"description": "Click a point", "params": {"x": "int", "y": "int"}}}}
+
+
+class FakeModel:
+    """ModelManager stand-in that replays scripted responses"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.prompts = []
+
+    async def generate_parsed(self, prompt, parse, prefix=None):
+        self.prompts.append(prefix)
+        return parse(json.dumps(self.responses.pop(0)))
+
+
+def make_loop(multi_mcp, model_manager=None):
+    # Prompt paths are relative to the project root
+    cwd = os.getcwd()
+    os.chdir(ROOT_DIR)
+    try:
+        loop = ComputerAgentLoop(multi_mcp, model_manager)
+    finally:
+        os.chdir(cwd)
+    loop.retry_base = 0  # No backoff sleeps in tests
+    return loop
+
+
+def tool_step(ctx):
+    return ctx.add_step("TOOL_1", "Executing tool", StepType.TOOL_EXECUTION, from_step="DECISION_1")
+
+
+class TestToolRetries(unittest.IsolatedAsyncioTestCase):
+    async def test_idempotent_tool_is_retried(self):
+        mcp = FakeMCP([{"success": False, "message": "Request timed out"}, {"success": True, "data": "ok"}])
+        loop = make_loop(mcp)
+        ctx = ComputerAgentContext("s", "q")
+        decision = {"selected_tool": "computer", "tool_parameters": {}}
+        step = tool_step(ctx)
+
+        self.assertTrue(loop._is_idempotent(decision))
+        result = await loop._execute_with_retry(ctx, decision, step)
+
+        self.assertEqual(result, {"success": True, "data": "ok"})
+        self.assertEqual(len(mcp.calls), 2)
+        self.assertEqual(ctx.get_step("TOOL_1").status, "completed")
+
+    async def test_raised_errors_stop_at_max_retries(self):
+        mcp = FakeMCP([ConnectionError("connection reset")] * 5)
+        loop = make_loop(mcp)
+        ctx = ComputerAgentContext("s", "q")
+        step = tool_step(ctx)
+
+        with self.assertRaises(ConnectionError):
+            await loop._execute_with_retry(ctx, {"selected_tool": "computer", "tool_parameters": {}}, step)
+
+        self.assertEqual(len(mcp.calls), loop.max_retries)
+        self.assertEqual(ctx.get_step("TOOL_1").status, "failed")
+
+    async def test_screen_action_is_not_repeated(self):
+        mcp = FakeMCP([{"success": False, "message": "Request timed out"}, {"success": True}])
+        loop = make_loop(mcp)
+        ctx = ComputerAgentContext("s", "q")
+        decision = {"selected_tool": "click", "tool_parameters": {"x": 1, "y": 2}}
+        step = tool_step(ctx)
+
+        self.assertFalse(loop._is_idempotent(decision))
+        result = await loop._execute_tool(ctx, decision, step)
+
+        self.assertEqual(result["success"], False)
+        self.assertEqual(len(mcp.calls), 1)
+
+    def test_retry_delay_is_capped(self):
+        loop = make_loop(FakeMCP([]))
+        loop.retry_base, loop.retry_cap = 0.05, 1.0
+        for retry_count in range(1, 12):
+            self.assertLessEqual(loop._retry_delay(retry_count), 1.5)
+
+
+PERCEPTION = {key: "" for key in PERCEPTION_KEYS} | {"route": "decision", "confidence": "0.9"}
+DECISION = {key: "" for key in DECISION_KEYS} | {"selected_tool": "click", "tool_parameters": {"x": 1, "y": 2}}
+
+
+class TestFusedPerception(unittest.IsolatedAsyncioTestCase):
+    async def perceive(self, responses):
+        model = FakeModel(responses)
+        loop = make_loop(FakeMCP([]), model)
+        loop.fuse_perception_decision = True
+        result = await loop._perceive(ComputerAgentContext("s", "q"), {}, "user_query")
+        return result, model
+
+    def test_fusion_is_opt_in(self):
+        self.assertFalse(make_loop(FakeMCP([])).fuse_perception_decision)
+
+    async def test_valid_fused_response(self):
+        (perception, decision), model = await self.perceive([{"perception": PERCEPTION, "decision": DECISION}])
+        self.assertEqual(perception, PERCEPTION)
+        self.assertEqual(decision, DECISION)
+        self.assertEqual(len(model.prompts), 1)
+
+    async def test_summarize_route_ignores_decision_keys(self):
+        summarize = PERCEPTION | {"route": "summarize"}
+        (perception, decision), _ = await self.perceive([{"perception": summarize, "decision": {}}])
+        self.assertEqual(perception["route"], "summarize")
+
+    async def test_invalid_decision_falls_back_to_perception_prompt(self):
+        incomplete = {key: value for key, value in DECISION.items() if key != "tool_parameters"}
+        (perception, decision), model = await self.perceive([
+            {"perception": PERCEPTION, "decision": incomplete},
+            PERCEPTION,
+        ])
+        self.assertEqual(perception, PERCEPTION)
+        self.assertIsNone(decision)  # Left to the decision prompt
+        self.assertEqual(len(model.prompts), 2)
+        self.assertNotEqual(model.prompts[0], model.prompts[1])
+
+    async def test_invalid_perception_falls_back(self):
+        (perception, decision), model = await self.perceive([
+            {"perception": "not an object", "decision": DECISION},
+            PERCEPTION,
+        ])
+        self.assertEqual(perception, PERCEPTION)
+        self.assertIsNone(decision)
+
+
+
+class TestSpeculativePerception(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # Sessions write their outputs under the working directory
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.mkdtemp()
+        os.chdir(self.tmp)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    async def test_starts_after_cycle_is_recorded(self):
+        loop = make_loop(FakeMCP([{"success": True}]))
+        loop.settle_delay = 0
+
+        async def capture(base_output_dir, step_number, settle_delay=0):
+            return None, {"seraphine_gemini_groups": {}}
+
+        perceptions = iter([PERCEPTION, PERCEPTION | {"route": "summarize"}])
+
+        async def perceive(ctx, pipeline_result, snapshot_type):
+            return next(perceptions), DECISION
+
+        started, checkpoints = [], []
+        speculate = loop._speculate_perception
+
+        def start_speculation(ctx, next_capture):
+            started.append((ctx.cycle_count, len(checkpoints)))
+            return speculate(ctx, next_capture)
+
+        checkpoint = ComputerAgentContext.checkpoint_async
+
+        async def record_checkpoint(ctx):
+            checkpoints.append(ctx.cycle_count)
+            return await checkpoint(ctx)
+
+        loop._capture_and_process = capture
+        loop._perceive = perceive
+        loop._speculate_perception = start_speculation
+        loop.summary.summarize = mock.AsyncMock(return_value={"status": "success"})
+        with mock.patch.object(ComputerAgentContext, "checkpoint_async", record_checkpoint):
+            result = await loop.run("q")
+
+        self.assertEqual(result, {"status": "success"})
+        self.assertEqual(started, [(1, 1)])  # After record_cycle and the checkpoint of cycle 1
+
+    async def test_failed_prefetch_error_is_retrieved(self):
+        loop = make_loop(FakeMCP([]))
+
+        async def fail():
+            raise RuntimeError("capture failed")
+
+        task = asyncio.create_task(fail())
+        await asyncio.sleep(0)
+        with mock.patch.object(loop_module.logger, "warning") as warning:
+            loop._discard_prefetch(task, None)
+        self.assertTrue(task.done())
+        warning.assert_called_once()
+        self.assertIn("capture failed", warning.call_args.args[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+# Add parent directory to path so we can import agent
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.core.context import ComputerAgentContext, StepType, BLOB_SPILL_THRESHOLD
+
+
+class TestRecordCycle(unittest.TestCase):
+    def test_last_cycle_keeps_formatted_timestamp(self):
+        ctx = ComputerAgentContext("s", "q")
+        ctx.record_cycle({"route": "decision"}, {"selected_tool": "click"}, {"success": True})
+        last_cycle = ctx.current_state["last_cycle"]
+        self.assertIsInstance(last_cycle["timestamp"], str)
+        parsed = datetime.fromisoformat(last_cycle["timestamp"])
+        self.assertAlmostEqual(parsed.timestamp(), last_cycle["timestamp_ns"] / 1e9, delta=1e-5)
+
+
+
+class TestPromptHistory(unittest.TestCase):
+    def make_ctx(self, tools):
+        ctx = ComputerAgentContext("s", "q")
+        for i in range(1, tools + 1):
+            ctx.add_step(f"TOOL_{i}", f"Executing click {i}", StepType.TOOL_EXECUTION)
+            ctx.mark_step_completed(f"TOOL_{i}", {"success": True})
+        return ctx
+
+    def test_recent_steps_and_summary_split_the_history(self):
+        ctx = self.make_ctx(4)
+        ctx.prompt_recent_steps = 1
+        history = ctx.prompt_history()
+        self.assertEqual([d["id"] for d in history["completed_steps"]], ["TOOL_4"])
+        self.assertIn("3 earlier completed steps", history["history_summary"])
+
+    def test_zero_recent_steps_summarizes_everything(self):
+        ctx = self.make_ctx(3)
+        ctx.prompt_recent_steps = 0
+        history = ctx.prompt_history()
+        self.assertEqual(history["completed_steps"], [])
+        self.assertIn("3 earlier completed steps", history["history_summary"])
+        self.assertIn("Executing click 1", history["history_summary"])
+
+    def test_more_recent_steps_than_history_summarizes_nothing(self):
+        ctx = self.make_ctx(3)
+        ctx.prompt_recent_steps = 5
+        history = ctx.prompt_history()
+        self.assertEqual(len(history["completed_steps"]), 3)
+        self.assertEqual(history["history_summary"], "")
+
+
+
+class TempDirTestCase(unittest.IsolatedAsyncioTestCase):
+    """Runs each test in a scratch working directory (session outputs are relative paths)"""
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.mkdtemp()
+        os.chdir(self.tmp)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+class TestPipelineOutputSpill(TempDirTestCase):
+    async def test_large_values_are_written_off_the_event_loop(self):
+        ctx = ComputerAgentContext("s", "q")
+        frame = np.arange(BLOB_SPILL_THRESHOLD, dtype=np.uint8).reshape(-1, 256)
+        writers = []
+        write_blobs = ctx._write_blobs
+
+        def record_writer(blobs):
+            writers.append(threading.current_thread())
+            write_blobs(blobs)
+
+        with mock.patch.object(ctx, "_write_blobs", record_writer):
+            slim = await ctx.set_pipeline_output_async({"frame": frame, "groups": {"a": 1}})
+
+        self.assertEqual(slim["groups"], {"a": 1})
+        self.assertEqual(slim["frame"]["shape"], list(frame.shape))
+        self.assertEqual(Path(slim["frame"]["__blobref__"]).read_bytes(), frame.tobytes())
+        self.assertEqual(len(writers), 1)
+        self.assertIsNot(writers[0], threading.main_thread())
+
+    async def test_small_values_stay_inline(self):
+        ctx = ComputerAgentContext("s", "q")
+        small = np.zeros((4, 4), dtype=np.uint8)
+        slim = await ctx.set_pipeline_output_async({"mask": small, "raw": b"png", "text": "ok"})
+        self.assertIs(slim["mask"], small)
+        self.assertEqual((slim["raw"], slim["text"]), (b"png", "ok"))
+        self.assertFalse(os.path.exists(ctx.output_dir / "blobs"))
+
+
+
+class TestStepSerialization(TempDirTestCase):
+    def test_to_dict_is_a_read_only_view(self):
+        ctx = ComputerAgentContext("s", "q")
+        step = ctx.add_step("TOOL_1", "Executing click", StepType.TOOL_EXECUTION)
+        view = step.to_dict()
+        with self.assertRaises(TypeError):
+            view["status"] = "completed"
+        self.assertEqual(view["status"], "pending")
+
+    def test_view_keeps_the_state_it_was_taken_in(self):
+        ctx = ComputerAgentContext("s", "q")
+        step = ctx.add_step("TOOL_1", "Executing click", StepType.TOOL_EXECUTION)
+        view = step.to_dict()
+        ctx.mark_step_completed("TOOL_1", {"success": True})
+        self.assertEqual(view["status"], "pending")
+        self.assertEqual(step.to_dict()["status"], "completed")
+
+    async def test_summary_serializes_step_views(self):
+        ctx = ComputerAgentContext("s", "q")
+        ctx.add_step("TOOL_1", "Executing click", StepType.TOOL_EXECUTION)
+        ctx.mark_step_completed("TOOL_1", {"success": True})
+        path = await ctx.save_summary_async()
+        with open(path) as f:
+            steps = json.load(f)["steps"]
+        self.assertEqual([(s["id"], s["status"]) for s in steps], [("ROOT", "pending"), ("TOOL_1", "completed")])
+
+    def test_summary_serializes_step_views_without_orjson(self):
+        ctx = ComputerAgentContext("s", "q")
+        ctx.add_step("TOOL_1", "Executing click", StepType.TOOL_EXECUTION)
+        with mock.patch("agent.core.context.ORJSON_AVAILABLE", False):
+            path = ctx.save_summary()
+        with open(path) as f:
+            self.assertEqual(len(json.load(f)["steps"]), 2)
+
+
+
+class TestCheckpoint(TempDirTestCase):
+    async def test_events_round_trip_through_checkpoints(self):
+        ctx = ComputerAgentContext("s", "q")
+        ctx.add_step("TOOL_1", "Executing click", StepType.TOOL_EXECUTION)
+        ctx.mark_step_completed("TOOL_1", {"success": True})
+        ctx.checkpoint()
+        ctx.add_step("TOOL_2", "Executing type", StepType.TOOL_EXECUTION)
+        ctx.mark_step_failed("TOOL_2", "window closed")
+        header_file = await ctx.checkpoint_async()
+
+        with open(header_file) as f:
+            header = json.load(f)
+        self.assertEqual(header["step_count"], 3)
+        events = list(ComputerAgentContext.load_events(header["events_file"]))
+        self.assertEqual(
+            [(e["event"], e.get("id") or e["step"]["id"]) for e in events],
+            [("add_step", "ROOT"), ("add_step", "TOOL_1"), ("step_status", "TOOL_1"),
+             ("add_step", "TOOL_2"), ("step_status", "TOOL_2")],
+        )
+        self.assertEqual(events[2]["result"], {"success": True})
+        self.assertEqual((events[4]["status"], events[4]["result"]), ("failed", {"error": "window closed"}))
+
+    def test_checkpoint_only_appends_new_events(self):
+        ctx = ComputerAgentContext("s", "q")
+        events_file = ctx.flush_events()
+        ctx.checkpoint()
+        ctx.checkpoint()
+        self.assertEqual(len(list(ComputerAgentContext.load_events(events_file))), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import sys
+import os
+import io
+import json
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+# Add parent directory to path so we can import utils
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import helpers
+
+
+class TestConfiguration(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.config_path = os.path.join(self.tmp, "config.json")
+        self.write_config({"mode": "deploy", "yolo": {"conf": 0.25}})
+        patcher = mock.patch.object(helpers, "CONFIG_PATH", self.config_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        helpers.clear_configuration_cache()
+        self.addCleanup(helpers.clear_configuration_cache)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def write_config(self, config):
+        with open(self.config_path, "w") as f:
+            json.dump(config, f)
+
+    def test_nested_changes_do_not_leak_into_the_cache(self):
+        config = helpers.load_configuration()
+        config["yolo"]["conf"] = 0.9
+        config["output_dir"] = "elsewhere"
+        self.assertEqual(helpers.load_configuration(), {"mode": "deploy", "yolo": {"conf": 0.25}})
+
+    def test_config_is_stat_at_most_once_per_interval(self):
+        helpers.load_configuration()
+        with mock.patch.object(helpers.os, "stat", wraps=os.stat) as stat:
+            for _ in range(100):
+                helpers.debug_print("hidden")
+                helpers.load_configuration()
+        stat.assert_not_called()
+
+    def test_debug_mode_follows_config_edits(self):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            helpers.debug_print("before")
+            self.write_config({"mode": "debug"})
+            os.utime(self.config_path, ns=(0, os.stat(self.config_path).st_mtime_ns + 1))
+            with mock.patch.object(helpers.time, "monotonic",
+                                   return_value=helpers.time.monotonic() + helpers.CONFIG_RECHECK_INTERVAL):
+                helpers.debug_print("after")
+        self.assertEqual(out.getvalue(), "after\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
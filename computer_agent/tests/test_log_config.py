@@ -0,0 +1,56 @@
+import sys
+import os
+import time
+import logging
+import unittest
+from unittest import mock
+
+# Add parent directory to path so we can import config
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import log_config
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class TestQueuedFileLogging(unittest.TestCase):
+    def setUp(self):
+        self.target = ListHandler()
+        self.logger = logging.getLogger(f"{__name__}.{self.id()}")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+
+    def attach(self):
+        handler = log_config._queued(self.target)
+        self.logger.addHandler(handler)
+        self.addCleanup(self.logger.removeHandler, handler)
+
+    def wait_for(self, count, timeout):
+        deadline = time.monotonic() + timeout
+        while len(self.target.messages) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.target.messages
+
+    def test_warning_is_written_immediately(self):
+        with mock.patch.object(log_config, "_FLUSH_INTERVAL", 60):
+            self.attach()
+        self.logger.info("info")
+        self.logger.warning("warning")
+        self.assertEqual(self.wait_for(2, timeout=1), ["info", "warning"])
+
+    def test_info_is_written_on_the_timer(self):
+        with mock.patch.object(log_config, "_FLUSH_INTERVAL", 0.05):
+            self.attach()
+        self.logger.info("info")
+        self.assertEqual(self.wait_for(1, timeout=1), ["info"])
+
+
+if __name__ == "__main__":
+    unittest.main()
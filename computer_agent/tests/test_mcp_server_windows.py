@@ -0,0 +1,77 @@
+import sys
+import os
+import asyncio
+import unittest
+from unittest import mock
+
+# Add src directory to path so we can import windowManager
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+try:
+    from windowManager import mcp_server_windows
+    from windowManager.mcp_server_windows import MCPServer, _unique_suffixes, SHORT_ID_LEN, CLIENT_QUEUE_SIZE
+    WINDOWS_SERVER_AVAILABLE = True
+except ImportError:  # pywin32 is only available on Windows
+    WINDOWS_SERVER_AVAILABLE = False
+
+
+@unittest.skipUnless(WINDOWS_SERVER_AVAILABLE, "Windows MCP server dependencies not installed")
+class TestUniqueSuffixes(unittest.TestCase):
+    def test_colliding_ids_get_the_shortest_distinct_suffix(self):
+        ids = {"hwnd_1_12345678", "hwnd_2_12345678"}
+        self.assertEqual(_unique_suffixes(ids), {"1_12345678": "hwnd_1_12345678", "2_12345678": "hwnd_2_12345678"})
+
+    def test_suffixes_are_longer_than_short_ids(self):
+        ids = {"app_a_87654321", "app_b_87654321", "app_c_87654321"}
+        suffixes = _unique_suffixes(ids)
+        self.assertEqual(set(suffixes.values()), ids)
+        for suffix, window_id in suffixes.items():
+            self.assertGreater(len(suffix), SHORT_ID_LEN)
+            self.assertTrue(window_id.endswith(suffix))
+            self.assertEqual([other for other in ids if other.endswith(suffix)], [window_id])
+
+    def test_short_ids_map_to_themselves(self):
+        self.assertEqual(_unique_suffixes({"1234", "abcd"}), {"1234": "1234", "abcd": "abcd"})
+
+
+@unittest.skipUnless(WINDOWS_SERVER_AVAILABLE, "Windows MCP server dependencies not installed")
+class TestClientQueues(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        with mock.patch.object(mcp_server_windows, "WindowManager"), \
+                mock.patch.object(mcp_server_windows, "WindowController"):
+            self.server = MCPServer()
+
+    def add_client(self):
+        client, queue = object(), asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self.server.clients[client] = queue
+        return client, queue
+
+    async def test_each_client_gets_its_own_copy(self):
+        queues = [self.add_client()[1] for _ in range(3)]
+        await self.server._broadcast_event("command_result", {"success": True})
+        payloads = [queue.get_nowait() for queue in queues]
+        self.assertTrue(payloads[0].startswith(b"event: command_result\ndata: "))
+        self.assertEqual(payloads, [payloads[0]] * 3)
+
+    async def test_slow_client_is_dropped_without_blocking_others(self):
+        slow, slow_queue = self.add_client()
+        fast, fast_queue = self.add_client()
+        for _ in range(CLIENT_QUEUE_SIZE):
+            slow_queue.put_nowait(b"pending")
+        await self.server._broadcast_event("command_result", {"success": True})
+
+        self.assertNotIn(slow, self.server.clients)
+        self.assertIsNone(slow_queue.get_nowait())  # handle_sse closes the stream on None
+        self.assertTrue(slow_queue.empty())
+        self.assertIn(fast, self.server.clients)
+        self.assertEqual(fast_queue.qsize(), 1)
+
+    async def test_shutdown_ends_every_stream(self):
+        queues = [self.add_client()[1] for _ in range(2)]
+        await self.server.shutdown()
+        self.assertEqual(self.server.clients, {})
+        self.assertEqual([queue.get_nowait() for queue in queues], [None, None])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import sys
+import os
+import time
+import unittest
+from functools import partial
+from unittest import mock
+
+# Add parent directory to path so we can import agent
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.models import mode_manager
+from agent.models.mode_manager import ModelManager
+from agent.utils.json_parser import parse_llm_json
+
+
+def make_manager(responses):
+    """ModelManager whose model calls replay the given response texts"""
+    manager = ModelManager(api_key="test-key")
+    manager.calls = 0
+
+    def generate_sync(prompt, prefix):
+        manager.calls += 1
+        return responses.pop(0)
+
+    manager._generate_sync = generate_sync
+    return manager
+
+
+class TestResponseCache(unittest.IsolatedAsyncioTestCase):
+    parse = staticmethod(partial(parse_llm_json, required_keys=["route"]))
+
+    @unittest.skipIf("AGENT_LLM_CACHE" in os.environ, "cache toggled explicitly")
+    def test_cache_is_opt_in(self):
+        self.assertFalse(mode_manager.LLM_CACHE_ENABLED)
+
+    async def test_disabled_cache_always_calls_model(self):
+        manager = make_manager(['{"route": "decision"}', '{"route": "summarize"}'])
+        with mock.patch.object(mode_manager, "LLM_CACHE_ENABLED", False):
+            first = await manager.generate_parsed("prompt", self.parse)
+            second = await manager.generate_parsed("prompt", self.parse)
+        self.assertEqual((first["route"], second["route"]), ("decision", "summarize"))
+        self.assertEqual(manager.calls, 2)
+
+    async def test_valid_response_is_reused(self):
+        manager = make_manager(['{"route": "decision"}'])
+        with mock.patch.object(mode_manager, "LLM_CACHE_ENABLED", True):
+            first = await manager.generate_parsed("prompt", self.parse, prefix="instructions")
+            second = await manager.generate_parsed("prompt", self.parse, prefix="instructions")
+        self.assertEqual(first, second)
+        self.assertEqual(manager.calls, 1)
+
+    async def test_invalid_response_is_not_cached(self):
+        manager = make_manager(['{"unexpected": true}', '{"route": "decision"}'])
+        with mock.patch.object(mode_manager, "LLM_CACHE_ENABLED", True):
+            with self.assertRaises(Exception):
+                await manager.generate_parsed("prompt", self.parse)
+            result = await manager.generate_parsed("prompt", self.parse)
+        self.assertEqual(result["route"], "decision")
+        self.assertEqual(manager.calls, 2)
+
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class TestPrefixCache(unittest.TestCase):
+    def setUp(self):
+        self.manager = ModelManager(api_key="test-key")
+        self.manager.model = mock.Mock()
+        self.manager.model.generate_content.side_effect = lambda prompt: FakeResponse(prompt)
+
+    def test_uncached_prefix_is_sent_inline(self):
+        create = mock.patch.object(mode_manager.genai.caching.CachedContent, "create",
+                                   side_effect=ValueError("prefix too small"))
+        with create:
+            text = self.manager._generate_sync("input", "instructions")
+        self.assertEqual(text, "instructions\n\ninput")
+
+    def test_renewal_deletes_replaced_content(self):
+        first, second = mock.Mock(name="first"), mock.Mock(name="second")
+        models = {first: mock.Mock(name="model_1"), second: mock.Mock(name="model_2")}
+        with mock.patch.object(mode_manager.genai.caching.CachedContent, "create", side_effect=[first, second]) as create, \
+                mock.patch.object(mode_manager.genai.GenerativeModel, "from_cached_content",
+                                  side_effect=lambda cached_content: models[cached_content]):
+            model = self.manager._model_for_prefix("instructions")
+            self.assertIs(self.manager._model_for_prefix("instructions"), model)
+            self.assertEqual(create.call_args.kwargs["contents"], ["instructions"])
+            # Past the renewal point the content is uploaded again and the old one removed
+            with mock.patch.object(mode_manager.time, "monotonic",
+                                   return_value=time.monotonic() + self.manager.prefix_cache_ttl):
+                renewed = self.manager._model_for_prefix("instructions")
+        self.assertIs(renewed, models[second])
+        first.delete.assert_called_once()
+        second.delete.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import sys
+import os
+import unittest
+
+# Add parent directory to path so we can import agent
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.core.context import ComputerAgentContext, StepType
+from agent.core.perception import PerceptionCache
+
+
+def screen(*labels):
+    """Pipeline result listing the given UI element labels"""
+    return {"seraphine_gemini_groups": {
+        f"group_{i}": {"label": label, "bbox": [i * 10, 20, i * 10 + 8, 28]} for i, label in enumerate(labels)
+    }}
+
+
+LABELS = ["File", "Edit", "Format", "View", "Help", "Untitled - Notepad", "Ln 1, Col 1", "100%", "UTF-8"]
+
+
+class TestPerceptionCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = PerceptionCache(threshold=0.9)
+        self.ctx = ComputerAgentContext("s", "open notepad")
+        self.perception = {"route": "decision", "screen_analysis": "Notepad is open"}
+
+    def store(self, pipeline_result, ctx=None):
+        partition = self.cache.partition_for(ctx or self.ctx, "step_result")
+        self.cache.add(partition, self.cache.embed(pipeline_result), self.perception)
+
+    def find(self, pipeline_result, ctx=None):
+        partition = self.cache.partition_for(ctx or self.ctx, "step_result")
+        return self.cache.lookup(partition, self.cache.embed(pipeline_result))
+
+    def test_near_identical_screen_hits(self):
+        self.store(screen(*LABELS))
+        # Same window, one status bar field changed
+        hit = self.find(screen(*LABELS[:-3], "Ln 1, Col 12", *LABELS[-2:]))
+        self.assertEqual(hit, self.perception)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_hit_survives_history_changes(self):
+        self.store(screen(*LABELS))
+        self.ctx.add_step("PERCEPTION_1", "Analyzing current screen state", StepType.PERCEPTION)
+        self.ctx.mark_step_completed("PERCEPTION_1", self.perception)
+        self.assertIsNotNone(self.find(screen(*LABELS)))
+
+    def test_different_screen_misses(self):
+        self.store(screen(*LABELS))
+        self.assertIsNone(self.find(screen("Start", "Search", "Recycle Bin", "Chrome", "Settings")))
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_other_query_misses(self):
+        self.store(screen(*LABELS))
+        self.assertIsNone(self.find(screen(*LABELS), ComputerAgentContext("s", "close notepad")))
+
+    def test_hit_is_a_copy(self):
+        self.store(screen(*LABELS))
+        self.find(screen(*LABELS))["route"] = "summarize"
+        self.assertEqual(self.find(screen(*LABELS))["route"], "decision")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,23 @@
+import copy
 import os
 import json
-from functools import wraps
+import time
+from functools import lru_cache, wraps
 
-def load_configuration():
-    """Load and validate configuration from config.json"""
-    config_path = "utils/config.json"
+CONFIG_PATH = "utils/config.json"
+
+# config.json is stat'ed at most this often (seconds), so edits are picked up within this long
+CONFIG_RECHECK_INTERVAL = 1.0
+
+_config_mtime_ns = None
+_config_checked_at = float("-inf")
+
+@lru_cache(maxsize=1)
+def _read_configuration(mtime_ns):
+    """Parse config.json; cached per modification time, so edits are picked up on the next call"""
+    config_path = CONFIG_PATH
     
-    if not os.path.exists(config_path):
+    if mtime_ns is None:
         print(f"Error: Configuration file '{config_path}' not found!")
         return None
     
@@ -18,14 +29,41 @@ def load_configuration():
         print(f"Error loading configuration: {e}")
         return None
 
+def _current_configuration():
+    """Parsed config.json as of its modification time, re-checked at most every CONFIG_RECHECK_INTERVAL"""
+    global _config_mtime_ns, _config_checked_at
+    now = time.monotonic()
+    if now - _config_checked_at >= CONFIG_RECHECK_INTERVAL:
+        try:
+            _config_mtime_ns = os.stat(CONFIG_PATH).st_mtime_ns
+        except OSError:
+            _config_mtime_ns = None
+        _config_checked_at = now
+    return _read_configuration(_config_mtime_ns)
+
+def load_configuration():
+    """Load and validate configuration from config.json"""
+    config = _current_configuration()
+    # Callers update their config in place (nested sections too), so hand out a deep copy of the cached one
+    return copy.deepcopy(config) if config is not None else None
+
+def clear_configuration_cache():
+    """Forget the parsed config.json so the next load re-reads it"""
+    global _config_checked_at
+    _config_checked_at = float("-inf")
+    _read_configuration.cache_clear()
+
+def _debug_enabled():
+    config = _current_configuration()
+    return bool(config) and config.get("mode", "").lower() == "debug"
+
 def debug_only(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
-        config = load_configuration()
-        if config and config.get("mode", "").lower() == "debug":
+        if _debug_enabled():
             return func(*args, **kwargs)
     return wrapper
 
-@debug_only
 def debug_print(*args, **kwargs):
-    print(*args, **kwargs)
\ No newline at end of file
+    if _debug_enabled():
+        print(*args, **kwargs)
\ No newline at end of file